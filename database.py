@@ -5,6 +5,7 @@
 
 import sqlite3
 import logging
+import threading
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from pathlib import Path
@@ -24,12 +25,34 @@ class Database:
         self.db_path = db_path
         self._init_database()
 
+        # Два постоянных соединения вместо открытия нового на каждый вызов:
+        # одно на запись (SQLite всё равно сериализует записи, поэтому
+        # достаточно одного, защищённого локом), второе — только на чтение.
+        # check_same_thread=False + локи позволяют использовать Database
+        # и из потоков, и из asyncio (через asyncio.to_thread).
+        self._write_lock = threading.Lock()
+        self._write_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._write_conn.row_factory = sqlite3.Row
+
+        self._read_lock = threading.Lock()
+        self._read_conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._read_conn.row_factory = sqlite3.Row
+
     def _get_connection(self) -> sqlite3.Connection:
-        """Получить соединение с БД."""
+        """Получить новое соединение с БД (для служебных операций)."""
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
 
+    def close(self) -> None:
+        """Закрыть постоянные соединения с БД."""
+        with self._write_lock:
+            self._write_conn.close()
+        with self._read_lock:
+            self._read_conn.close()
+
     def _init_database(self) -> None:
         """Создать таблицы, если их нет."""
         conn = self._get_connection()
@@ -90,6 +113,25 @@ class Database:
         except sqlite3.OperationalError:
             pass  # Колонка уже существует
 
+        # Кэш резолвленных Telegram-сущностей (id + access_hash стабильны,
+        # кэширование избавляет от resolveUsername на каждый запуск)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS telegram_entities (
+                channel_id TEXT PRIMARY KEY,
+                entity_id INTEGER NOT NULL,
+                access_hash INTEGER NOT NULL,
+                username TEXT,
+                ewma_new REAL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Добавляем колонку ewma_new если её нет (для существующих БД)
+        try:
+            cursor.execute("ALTER TABLE telegram_entities ADD COLUMN ewma_new REAL DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass  # Колонка уже существует
+
         # Индексы для быстрого поиска
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_source_posts_status 
@@ -128,16 +170,15 @@ class Database:
         Returns:
             ID созданного поста или None, если пост уже существует
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
         try:
-            cursor.execute("""
-                INSERT INTO source_posts (channel_id, message_id, text_original, photo_file_id, date, status)
-                VALUES (?, ?, ?, ?, ?, 'new')
-            """, (channel_id, str(message_id), text_original, photo_file_id, date))
-            post_id = cursor.lastrowid
-            conn.commit()
+            with self._write_lock:
+                cursor = self._write_conn.cursor()
+                cursor.execute("""
+                    INSERT INTO source_posts (channel_id, message_id, text_original, photo_file_id, date, status)
+                    VALUES (?, ?, ?, ?, ?, 'new')
+                """, (channel_id, str(message_id), text_original, photo_file_id, date))
+                post_id = cursor.lastrowid
+                self._write_conn.commit()
             logger.debug("Добавлен исходный пост: channel_id=%s, message_id=%s, id=%s", 
                         channel_id, message_id, post_id)
             return post_id
@@ -146,8 +187,6 @@ class Database:
             logger.debug("Пост уже существует: channel_id=%s, message_id=%s", 
                         channel_id, message_id)
             return None
-        finally:
-            conn.close()
 
     def get_new_source_posts(self) -> List[Dict[str, Any]]:
         """Получить все исходные посты со статусом 'new'.
@@ -155,18 +194,15 @@ class Database:
         Returns:
             Список словарей с данными постов
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT id, channel_id, message_id, text_original, date
-            FROM source_posts
-            WHERE status = 'new'
-            ORDER BY date ASC
-        """)
-
-        rows = cursor.fetchall()
-        conn.close()
+        with self._read_lock:
+            cursor = self._read_conn.cursor()
+            cursor.execute("""
+                SELECT id, channel_id, message_id, text_original, date
+                FROM source_posts
+                WHERE status = 'new'
+                ORDER BY date ASC
+            """)
+            rows = cursor.fetchall()
 
         posts = []
         for row in rows:
@@ -186,17 +222,14 @@ class Database:
         Args:
             post_id: ID поста
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            UPDATE source_posts
-            SET status = 'processed'
-            WHERE id = ?
-        """, (post_id,))
-
-        conn.commit()
-        conn.close()
+        with self._write_lock:
+            cursor = self._write_conn.cursor()
+            cursor.execute("""
+                UPDATE source_posts
+                SET status = 'processed'
+                WHERE id = ?
+            """, (post_id,))
+            self._write_conn.commit()
         logger.debug("Исходный пост отмечен как обработанный: id=%s", post_id)
 
     def add_draft_post(
@@ -224,18 +257,15 @@ class Database:
         Returns:
             ID созданного черновика
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO draft_posts 
-            (source_post_id, title, body, hashtags, gpt_response_raw, image_query, final_image_url, pexels_images_json, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'pending_moderation')
-        """, (source_post_id, title, body, hashtags, gpt_response_raw, image_query, final_image_url, pexels_images_json))
-
-        draft_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._write_lock:
+            cursor = self._write_conn.cursor()
+            cursor.execute("""
+                INSERT INTO draft_posts 
+                (source_post_id, title, body, hashtags, gpt_response_raw, image_query, final_image_url, pexels_images_json, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'pending_moderation')
+            """, (source_post_id, title, body, hashtags, gpt_response_raw, image_query, final_image_url, pexels_images_json))
+            draft_id = cursor.lastrowid
+            self._write_conn.commit()
 
         logger.info("Создан черновик: id=%s, source_post_id=%s", draft_id, source_post_id)
         return draft_id
@@ -246,34 +276,31 @@ class Database:
         Returns:
             Список словарей с данными черновиков
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT 
-                d.id,
-                d.source_post_id,
-                d.title,
-                d.body,
-                d.hashtags,
-                d.gpt_response_raw,
-                d.image_query,
-                d.final_image_url,
-                d.pexels_images_json,
-                d.created_at,
-                s.channel_id,
-                s.message_id,
-                s.text_original,
-                s.photo_file_id,
-                s.date as source_date
-            FROM draft_posts d
-            JOIN source_posts s ON d.source_post_id = s.id
-            WHERE d.status = 'pending_moderation'
-            ORDER BY d.created_at DESC
-        """)
-
-        rows = cursor.fetchall()
-        conn.close()
+        with self._read_lock:
+            cursor = self._read_conn.cursor()
+            cursor.execute("""
+                SELECT 
+                    d.id,
+                    d.source_post_id,
+                    d.title,
+                    d.body,
+                    d.hashtags,
+                    d.gpt_response_raw,
+                    d.image_query,
+                    d.final_image_url,
+                    d.pexels_images_json,
+                    d.created_at,
+                    s.channel_id,
+                    s.message_id,
+                    s.text_original,
+                    s.photo_file_id,
+                    s.date as source_date
+                FROM draft_posts d
+                JOIN source_posts s ON d.source_post_id = s.id
+                WHERE d.status = 'pending_moderation'
+                ORDER BY d.created_at DESC
+            """)
+            rows = cursor.fetchall()
 
         drafts = []
         for row in rows:
@@ -315,34 +342,31 @@ class Database:
         Returns:
             Словарь с данными черновика или None
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT 
-                d.id,
-                d.source_post_id,
-                d.title,
-                d.body,
-                d.hashtags,
-                d.gpt_response_raw,
-                d.image_query,
-                d.final_image_url,
-                d.pexels_images_json,
-                d.status,
-                d.target_chat_id,
-                d.target_message_id,
-                s.channel_id,
-                s.message_id,
-                s.text_original,
-                s.photo_file_id
-            FROM draft_posts d
-            JOIN source_posts s ON d.source_post_id = s.id
-            WHERE d.id = ?
-        """, (draft_id,))
-
-        row = cursor.fetchone()
-        conn.close()
+        with self._read_lock:
+            cursor = self._read_conn.cursor()
+            cursor.execute("""
+                SELECT 
+                    d.id,
+                    d.source_post_id,
+                    d.title,
+                    d.body,
+                    d.hashtags,
+                    d.gpt_response_raw,
+                    d.image_query,
+                    d.final_image_url,
+                    d.pexels_images_json,
+                    d.status,
+                    d.target_chat_id,
+                    d.target_message_id,
+                    s.channel_id,
+                    s.message_id,
+                    s.text_original,
+                    s.photo_file_id
+                FROM draft_posts d
+                JOIN source_posts s ON d.source_post_id = s.id
+                WHERE d.id = ?
+            """, (draft_id,))
+            row = cursor.fetchone()
 
         if not row:
             return None
@@ -403,9 +427,6 @@ class Database:
             status: Новый статус (опционально)
             final_image_url: URL стилизованной картинки (опционально)
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
         updates = []
         params = []
 
@@ -434,10 +455,9 @@ class Database:
             params.append(draft_id)
 
             query = f"UPDATE draft_posts SET {', '.join(updates)} WHERE id = ?"
-            cursor.execute(query, params)
-            conn.commit()
-
-        conn.close()
+            with self._write_lock:
+                self._write_conn.execute(query, params)
+                self._write_conn.commit()
         logger.debug("Черновик обновлён: id=%s", draft_id)
 
     def mark_draft_published(
@@ -453,41 +473,106 @@ class Database:
             target_chat_id: ID целевого канала
             target_message_id: ID сообщения в целевом канале
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            UPDATE draft_posts
-            SET status = 'published',
-                target_chat_id = ?,
-                target_message_id = ?,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (target_chat_id, target_message_id, draft_id))
-
-        conn.commit()
-        conn.close()
+        with self._write_lock:
+            cursor = self._write_conn.cursor()
+            cursor.execute("""
+                UPDATE draft_posts
+                SET status = 'published',
+                    target_chat_id = ?,
+                    target_message_id = ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (target_chat_id, target_message_id, draft_id))
+            self._write_conn.commit()
         logger.info("Черновик отмечен как опубликованный: id=%s, target_chat_id=%s", 
                    draft_id, target_chat_id)
 
+    def get_telegram_entity(self, channel_id: str) -> Optional[Dict[str, Any]]:
+        """Получить закэшированную Telegram-сущность канала.
+
+        Args:
+            channel_id: ID канала (как в конфиге, например @username)
+
+        Returns:
+            Словарь с entity_id, access_hash и username или None
+        """
+        with self._read_lock:
+            cursor = self._read_conn.cursor()
+            cursor.execute("""
+                SELECT entity_id, access_hash, username, ewma_new
+                FROM telegram_entities
+                WHERE channel_id = ?
+            """, (channel_id,))
+            row = cursor.fetchone()
+
+        if not row:
+            return None
+        return {
+            "entity_id": row["entity_id"],
+            "access_hash": row["access_hash"],
+            "username": row["username"],
+            "ewma_new": row["ewma_new"] or 0.0,
+        }
+
+    def save_telegram_entity(
+        self,
+        channel_id: str,
+        entity_id: int,
+        access_hash: int,
+        username: Optional[str] = None,
+    ) -> None:
+        """Сохранить резолвленную Telegram-сущность в кэш.
+
+        Args:
+            channel_id: ID канала (как в конфиге)
+            entity_id: Числовой ID сущности
+            access_hash: access_hash сущности
+            username: username канала (опционально)
+        """
+        with self._write_lock:
+            cursor = self._write_conn.cursor()
+            cursor.execute("""
+                INSERT OR REPLACE INTO telegram_entities
+                (channel_id, entity_id, access_hash, username, updated_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (channel_id, entity_id, access_hash, username))
+            self._write_conn.commit()
+        logger.debug("Сущность канала закэширована: channel_id=%s, entity_id=%s",
+                    channel_id, entity_id)
+
+    def update_channel_ewma(self, channel_id: str, new_count: int, alpha: float = 0.3) -> None:
+        """Обновить скользящую оценку числа новых постов канала.
+
+        Args:
+            channel_id: ID канала (как в конфиге)
+            new_count: Сколько новых постов пришло за последний опрос
+            alpha: Коэффициент сглаживания EWMA
+        """
+        with self._write_lock:
+            cursor = self._write_conn.cursor()
+            cursor.execute("""
+                UPDATE telegram_entities
+                SET ewma_new = ? * ? + (1 - ?) * COALESCE(ewma_new, 0),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE channel_id = ?
+            """, (alpha, new_count, alpha, channel_id))
+            self._write_conn.commit()
+
     def mark_draft_rejected(self, draft_id: int) -> None:
         """Отметить черновик как отклонённый.
 
         Args:
             draft_id: ID черновика
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            UPDATE draft_posts
-            SET status = 'rejected',
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (draft_id,))
-
-        conn.commit()
-        conn.close()
+        with self._write_lock:
+            cursor = self._write_conn.cursor()
+            cursor.execute("""
+                UPDATE draft_posts
+                SET status = 'rejected',
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (draft_id,))
+            self._write_conn.commit()
         logger.info("Черновик отмечен как отклонённый: id=%s", draft_id)
 
 
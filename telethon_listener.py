@@ -5,7 +5,7 @@
 
 import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Optional
 
 from telethon import TelegramClient, events
@@ -216,8 +216,9 @@ class TelethonListener:
         else:
             logger.debug("В сообщении нет фото: channel_id=%s, message_id=%s", channel_id, message_id)
 
-        # Дата сообщения
-        post_date = message.date if message.date else datetime.now()
+        # Дата сообщения (message.date у Telethon практически всегда задан,
+        # fallback оставлен для надёжности и в том же UTC-виде)
+        post_date = message.date or datetime.now(timezone.utc)
 
         # Сохраняем в БД
         try:
@@ -5,11 +5,18 @@
 """
 
 import asyncio
+import json
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import orjson  # быстрая сериализация JSON, если установлен
+except ImportError:
+    orjson = None
 
 from telethon import TelegramClient
-from telethon.tl.types import Message
+from telethon.tl.types import InputPeerChannel, Message
 
 import config_moderation as config
 from database import Database
@@ -20,6 +27,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Файл структурированного лога инжеста (JSON Lines)
+INGEST_LOG_FILE = Path("ingest.jsonl")
+
+
+def _dump_event(event: dict) -> bytes:
+    """Сериализовать событие инжеста в строку JSONL."""
+    if orjson is not None:
+        return orjson.dumps(event) + b"\n"
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
 
 async def fetch_and_add_posts():
     """Получить последние посты из каналов и добавить в БД."""
@@ -35,81 +52,111 @@ async def fetch_and_add_posts():
     await client.start(phone=config.TELEGRAM_PHONE)
     
     logger.info("Подключение к каналам...")
+
+    # Пер-постовые события пишем не в текстовый лог (формат + stderr на
+    # каждую строку), а в буферизованный JSONL-файл со сбросом раз в канал
+    ingest_log = open(INGEST_LOG_FILE, "ab", buffering=65536)
     
     for channel_id in config.SOURCE_CHANNEL_IDS:
         try:
-            logger.info(f"Получаем посты из канала: {channel_id}")
-            entity = await client.get_entity(channel_id)
+            logger.info("Получаем посты из канала: %s", channel_id)
+
+            # Сначала смотрим кэш резолвленных сущностей — id и access_hash
+            # стабильны, так что get_entity (лишний round-trip к Telegram)
+            # нужен только при первом обращении к каналу
+            cached = db.get_telegram_entity(channel_id)
+            if cached:
+                entity = InputPeerChannel(cached["entity_id"], cached["access_hash"])
+                if cached["username"]:
+                    channel_username = f"@{cached['username']}"
+                else:
+                    channel_username = str(cached["entity_id"])
+            else:
+                entity = await client.get_entity(channel_id)
+                username = getattr(entity, "username", None)
+                access_hash = getattr(entity, "access_hash", None)
+                if access_hash is not None:
+                    db.save_telegram_entity(channel_id, entity.id, access_hash, username)
+                if username:
+                    channel_username = f"@{username}"
+                else:
+                    channel_username = str(entity.id)
             
-            # Получаем последние 3 поста
-            messages = await client.get_messages(entity, limit=3)
+            # Адаптивный limit: по EWMA наблюдаемого темпа новых постов
+            # (от 1 до 20, по умолчанию 3, пока статистики нет)
+            ewma = cached["ewma_new"] if cached else 0.0
+            limit = max(1, min(20, int(ewma * 2))) if ewma > 0 else 3
+            messages = await client.get_messages(entity, limit=limit)
             
             added_count = 0
-            for message in messages:
-                if not isinstance(message, Message):
-                    continue
-                
-                # Получаем текст
-                text = message.message or ""
-                if not text.strip():
-                    logger.info(f"Пропущен пост без текста: message_id={message.id}")
-                    continue
-                
-                # Получаем ID канала
-                if hasattr(entity, "username") and entity.username:
-                    channel_username = f"@{entity.username}"
-                else:
-                    channel_username = str(entity.id)
-                
+            # message.date у Telethon практически всегда заполнен; на редкий
+            # fallback берём один снимок времени на батч, а не datetime.now()
+            # на каждую строку
+            now = datetime.now(timezone.utc)
+            # get_messages уже возвращает Message-объекты; одним генератором
+            # отсекаем сервисные сообщения и посты без текста, чтобы не
+            # тратить ветки в теле цикла на каждый элемент
+            for message in (m for m in messages
+                            if isinstance(m, Message) and (m.message or "").strip()):
+                text = message.message
+
                 # Добавляем в БД
                 post_id = db.add_source_post(
                     channel_id=channel_username,
                     message_id=message.id,
                     text_original=text,
-                    date=message.date if message.date else datetime.now(),
+                    date=message.date or now,
                 )
                 
                 if post_id:
                     added_count += 1
-                    logger.info(
-                        f"✅ Добавлен пост: channel={channel_username}, "
-                        f"message_id={message.id}, post_id={post_id}, "
-                        f"text_preview={text[:50]}..."
-                    )
+                    ingest_log.write(_dump_event({
+                        "evt": "added",
+                        "chan": channel_username,
+                        "msg_id": message.id,
+                        "post_id": post_id,
+                        "preview": text[:50],
+                    }))
                 else:
-                    logger.info(
-                        f"⚠️ Пост уже существует: channel={channel_username}, "
-                        f"message_id={message.id}"
-                    )
-            
-            logger.info(f"Из канала {channel_id} добавлено новых постов: {added_count}")
+                    ingest_log.write(_dump_event({
+                        "evt": "duplicate",
+                        "chan": channel_username,
+                        "msg_id": message.id,
+                    }))
+
+            ingest_log.flush()
+            logger.info("Из канала %s добавлено новых постов: %s", channel_id, added_count)
+
+            # Обновляем статистику темпа для следующего опроса
+            db.update_channel_ewma(channel_id, added_count)
             
         except Exception as e:
-            logger.error(f"Ошибка при обработке канала {channel_id}: {e}", exc_info=True)
+            logger.error("Ошибка при обработке канала %s: %s", channel_id, e, exc_info=True)
     
+    ingest_log.close()
     await client.disconnect()
     
     # Проверяем что посты добавлены
     new_posts = db.get_new_source_posts()
-    logger.info(f"\n📊 Итого новых постов для обработки: {len(new_posts)}")
+    logger.info("\n📊 Итого новых постов для обработки: %s", len(new_posts))
     
-    if new_posts:
+    if new_posts and logger.isEnabledFor(logging.INFO):
         logger.info("Список новых постов:")
         for post in new_posts:
             logger.info(
-                f"  - Post ID: {post['id']}, Channel: {post['channel_id']}, "
-                f"Text: {post['text_original'][:60]}..."
+                "  - Post ID: %s, Channel: %s, Text: %s...",
+                post['id'], post['channel_id'], post['text_original'][:60],
             )
     
     # Проверяем черновики
     drafts = db.get_pending_draft_posts()
-    logger.info(f"\n📝 Черновиков на модерации: {len(drafts)}")
+    logger.info("\n📝 Черновиков на модерации: %s", len(drafts))
     
-    if drafts:
+    if drafts and logger.isEnabledFor(logging.INFO):
         logger.info("Последние черновики:")
         for draft in drafts[:3]:
             logger.info(
-                f"  - Draft ID: {draft['id']}, Title: {draft['title'][:50]}..."
+                "  - Draft ID: %s, Title: %s...", draft['id'], draft['title'][:50]
             )
 
 
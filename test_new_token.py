@@ -5,6 +5,18 @@
 
 import requests
 
+try:
+    import orjson  # быстрый разбор JSON, если установлен
+except ImportError:
+    orjson = None
+
+
+def _decode_json(resp):
+    """Разобрать JSON-ответ VK API (orjson при наличии, иначе stdlib)."""
+    if orjson is not None:
+        return orjson.loads(resp.content)
+    return resp.json()
+
 # Новый токен пользователя, полученный через OAuth
 NEW_TOKEN = "vk1.a.LSaMaMv9ZuMr9a1VNgV8nbnxcbJ2sTsak-9r-NEzNxvQRH2S37JX3ctrsB1vAnmAAmJRBatzNMHkPnhHXzY-V-MNPiH96istX1cOzcTk3AKr-aWQwymLRILWp0YiZSsWgwolbz2yAFxXygOlvpdV1KjKcWVxzbqHSp-nZ3cL8_x1ceaa51bQPq4h9bRoTW0IUlJKtEpZoZGwMWZCmhuEgg"
 
@@ -29,7 +41,7 @@ params = {
 try:
     resp = requests.get(url, params=params, timeout=10)
     resp.raise_for_status()
-    data = resp.json()
+    data = _decode_json(resp)
     
     if "error" in data:
         error = data["error"]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Тест потокового разбора мобильной стены (_parse_mobile_posts_iterparse).
+Прогоняет реалистичный кусок HTML мобильной версии VK через парсер и
+проверяет id, текст, вложения, дедупликацию и ограничение POSTS_LIMIT.
+"""
+
+import logging
+
+from vk_parser_with_auth import _parse_mobile_posts_iterparse, POSTS_LIMIT
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Урезанный, но структурно реалистичный фрагмент мобильной стены:
+# текст поста, ссылка wall-…, разметка внутри текста, хвост после ссылки,
+# пост с видео и дубль ссылки на уже виденный пост
+MOBILE_WALL_HTML = """
+<html><head><meta charset="utf-8"></head><body>
+<div class="wall_item">
+  <div class="pi_text">Текст первого поста с <b>разметкой</b></div>
+  <a href="/wall-235512260_101">ссылка на пост</a>
+  <span>хвост после ссылки</span>
+</div>
+<div class="wall_item">
+  <div class="pi_text">⚡️Трансляция: Синнер — Алькарас</div>
+  <a href="/wall-235512260_102">пост</a>
+  <a href="/video-235512260_555">видео</a>
+</div>
+<div class="wall_item">
+  <a href="/wall-235512260_102">дубль того же поста</a>
+</div>
+</body></html>
+"""
+
+
+def test_realistic_wall():
+    """Разбор реалистичного фрагмента: id, текст, вложения, дедупликация."""
+    posts = _parse_mobile_posts_iterparse(MOBILE_WALL_HTML)
+
+    assert [p["id"] for p in posts] == [101, 102], posts
+    # Текст собирается со всего div поста, включая вложенную разметку
+    assert "Текст первого поста" in posts[0]["text"], posts[0]
+    assert "разметкой" in posts[0]["text"], posts[0]
+    assert posts[0]["attachments"] == [], posts[0]
+    # Кириллица не должна превращаться в кракозябры (кодировка utf-8)
+    assert "Трансляция" in posts[1]["text"], posts[1]
+    assert posts[1]["attachments"] == [{"type": "video"}], posts[1]
+
+
+def test_posts_limit():
+    """Разбор обрывается после POSTS_LIMIT постов."""
+    items = "".join(
+        f'<div><p>пост {i}</p><a href="/wall-1_{i}">x</a></div>'
+        for i in range(1, POSTS_LIMIT * 2)
+    )
+    posts = _parse_mobile_posts_iterparse(f"<html><body>{items}</body></html>")
+
+    assert len(posts) == POSTS_LIMIT, len(posts)
+    assert posts[0]["id"] == 1, posts[0]
+
+
+def test_empty_page():
+    """Страница без ссылок на посты — пустой результат, без исключений."""
+    assert _parse_mobile_posts_iterparse("<html><body><p>пусто</p></body></html>") == []
+
+
+if __name__ == "__main__":
+    test_realistic_wall()
+    test_posts_limit()
+    test_empty_page()
+    logger.info("✅ Все тесты _parse_mobile_posts_iterparse прошли.")
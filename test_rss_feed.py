@@ -3,18 +3,17 @@
 Проверка RSS фида для группы VK
 """
 
-import requests
+import asyncio
 import xml.etree.ElementTree as ET
-import re
+
+import httpx
 
 VK_GROUP_DOMAIN = "club235512260"
 VK_GROUP_ID = 235512260
 
-print("="*70)
-print("ПРОВЕРКА RSS ФИДА VK")
-print("="*70)
-print(f"Группа: {VK_GROUP_DOMAIN} (ID: {VK_GROUP_ID})")
-print()
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+}
 
 # Пробуем разные варианты RSS URL
 rss_urls = [
@@ -23,46 +22,87 @@ rss_urls = [
     f"https://vk.com/feeds/{VK_GROUP_DOMAIN}.xml",
 ]
 
-for rss_url in rss_urls:
+
+def print_result(rss_url, resp, error):
+    """Вывести результат проверки одного RSS URL.
+
+    Returns:
+        True, если фид рабочий (дальше можно не смотреть)
+    """
     print(f"Пробую: {rss_url}")
     print("-" * 70)
+
+    if error is not None:
+        print(f"❌ Ошибка: {error}")
+        print()
+        return False
+
+    print(f"Статус: {resp.status_code}")
+
+    if resp.status_code == 200:
+        try:
+            root = ET.fromstring(resp.text)
+            items = root.findall(".//item")
+            print(f"✅ RSS работает! Найдено {len(items)} постов")
+
+            if items:
+                print("\nПервые 3 поста:")
+                for i, item in enumerate(items[:3], 1):
+                    title = item.find("title")
+                    link = item.find("link")
+                    title_text = title.text if title is not None else "Нет заголовка"
+                    link_text = link.text if link is not None else "Нет ссылки"
+                    print(f"  {i}. {title_text[:50]}...")
+                    print(f"     {link_text}")
+            print()
+            return True
+        except ET.ParseError as e:
+            print(f"❌ Ошибка парсинга XML: {e}")
+    elif resp.status_code == 404:
+        print("❌ RSS недоступен (404) - группа может быть закрытой")
+    else:
+        print(f"❌ Ошибка: {resp.status_code}")
+        print(f"   Ответ: {resp.text[:200]}")
+
+    print()
+    return False
+
+
+async def fetch(client, rss_url):
+    """Загрузить один RSS URL, вернув (response, error)."""
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        }
-        
-        resp = requests.get(rss_url, headers=headers, timeout=15)
-        print(f"Статус: {resp.status_code}")
-        
-        if resp.status_code == 200:
-            try:
-                root = ET.fromstring(resp.text)
-                items = root.findall(".//item")
-                print(f"✅ RSS работает! Найдено {len(items)} постов")
-                
-                if items:
-                    print("\nПервые 3 поста:")
-                    for i, item in enumerate(items[:3], 1):
-                        title = item.find("title")
-                        link = item.find("link")
-                        title_text = title.text if title is not None else "Нет заголовка"
-                        link_text = link.text if link is not None else "Нет ссылки"
-                        print(f"  {i}. {title_text[:50]}...")
-                        print(f"     {link_text}")
-                break
-            except ET.ParseError as e:
-                print(f"❌ Ошибка парсинга XML: {e}")
-        elif resp.status_code == 404:
-            print("❌ RSS недоступен (404) - группа может быть закрытой")
-        else:
-            print(f"❌ Ошибка: {resp.status_code}")
-            print(f"   Ответ: {resp.text[:200]}")
+        resp = await client.get(rss_url)
+        return resp, None
     except Exception as e:
-        print(f"❌ Ошибка: {e}")
-    
+        return None, e
+
+
+async def main():
+    print("=" * 70)
+    print("ПРОВЕРКА RSS ФИДА VK")
+    print("=" * 70)
+    print(f"Группа: {VK_GROUP_DOMAIN} (ID: {VK_GROUP_ID})")
+    print()
+
+    # Опрашиваем все варианты URL параллельно одним клиентом
+    # (HTTP/2 мультиплексирует их по одному соединению, если установлен h2)
+    try:
+        client = httpx.AsyncClient(headers=HEADERS, timeout=15, http2=True)
+    except ImportError:
+        client = httpx.AsyncClient(headers=HEADERS, timeout=15)
+
+    async with client:
+        results = await asyncio.gather(*(fetch(client, url) for url in rss_urls))
+
+    for rss_url, (resp, error) in zip(rss_urls, results):
+        if print_result(rss_url, resp, error):
+            break
+
     print()
+    print("=" * 70)
+    print("ПРОВЕРКА ЗАВЕРШЕНА")
+    print("=" * 70)
+
 
-print()
-print("="*70)
-print("ПРОВЕРКА ЗАВЕРШЕНА")
-print("="*70)
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,6 +5,18 @@
 
 import requests
 
+try:
+    import orjson  # быстрый разбор JSON, если установлен
+except ImportError:
+    orjson = None
+
+
+def _decode_json(resp):
+    """Разобрать JSON-ответ VK API (orjson при наличии, иначе stdlib)."""
+    if orjson is not None:
+        return orjson.loads(resp.content)
+    return resp.json()
+
 # Новый токен формата vk1.a. - ВСТАВЬТЕ ПОЛНЫЙ ТОКЕН ИЗ URL
 # Токен должен начинаться с vk1.a. и быть полным (не обрезанным)
 NEW_TOKEN = "vk1.a.ВСТАВЬТЕ_ПОЛНЫЙ_ТОКЕН_ЗДЕСЬ"
@@ -30,7 +42,7 @@ params = {
 try:
     resp = requests.get(url, params=params, timeout=10)
     resp.raise_for_status()
-    data = resp.json()
+    data = _decode_json(resp)
     
     if "error" in data:
         error = data["error"]
@@ -7,6 +7,7 @@
 import logging
 import sys
 import os
+import time
 from pathlib import Path
 
 # Настройка логирования
@@ -35,14 +36,37 @@ if _env_file.exists():
                 if key in ["VK_TOKEN", "VK_TOKEN_2"] and key not in os.environ:
                     os.environ[key] = value
 
+import vk_to_telegram
 from vk_to_telegram import get_vk_posts_via_api, VK_TOKEN, VK_TOKEN_2
 
+# Небольшой TTL-кэш по токену: если оба токена (или повторный вызов через
+# get_vk_posts) дают один и тот же запрос, не ходим в VK повторно
+_WALL_CACHE = {}
+_WALL_CACHE_TTL = 30  # секунд
+
+
+def _cached_wall_get(token=None):
+    """wall.get с мемоизацией результата по токену на время теста."""
+    entry = _WALL_CACHE.get(token)
+    if entry is not None:
+        posts, fetched_at = entry
+        if time.monotonic() - fetched_at < _WALL_CACHE_TTL:
+            return posts
+    posts = get_vk_posts_via_api(token)
+    _WALL_CACHE[token] = (posts, time.monotonic())
+    return posts
+
+
+# Подменяем функцию в модуле, чтобы и get_vk_posts() в шаге 3
+# переиспользовал уже полученные ответы вместо новых запросов к VK
+vk_to_telegram.get_vk_posts_via_api = _cached_wall_get
+
 # Проверка первого токена
 print("1. Проверка первого токена VK API...")
 print("-" * 70)
 token_1 = os.getenv("VK_TOKEN") or VK_TOKEN
 if token_1 and token_1 != "VK_ACCESS_TOKEN":
-    posts = get_vk_posts_via_api(token_1)
+    posts = _cached_wall_get(token_1)
     if posts:
         print(f"   ✅ Первый токен работает! Получено {len(posts)} пост(ов)")
         for post in posts[:3]:
@@ -63,7 +87,7 @@ print("2. Проверка второго токена VK API...")
 print("-" * 70)
 token_2 = os.getenv("VK_TOKEN_2") or VK_TOKEN_2
 if token_2 and token_2 != "":
-    posts = get_vk_posts_via_api(token_2)
+    posts = _cached_wall_get(token_2)
     if posts:
         print(f"   ✅ Второй токен работает! Получено {len(posts)} пост(ов)")
         for post in posts[:3]:
@@ -6,6 +6,18 @@
 import requests
 import sys
 
+try:
+    import orjson  # быстрый разбор JSON, если установлен
+except ImportError:
+    orjson = None
+
+
+def _decode_json(resp):
+    """Разобрать JSON-ответ VK API (orjson при наличии, иначе stdlib)."""
+    if orjson is not None:
+        return orjson.loads(resp.content)
+    return resp.json()
+
 # Ключи для проверки
 SERVICE_KEY = "d165ed0dd165ed0dd165ed0dddd25853dbdd165d165ed0db84a1c02d67d4a7083b2f985"
 PROTECTED_KEY = "hDMS4IS0pJSfhcP5qP86"
@@ -30,7 +42,7 @@ def test_token(token_name, token):
     try:
         resp = requests.get(url, params=params, timeout=10)
         resp.raise_for_status()
-        data = resp.json()
+        data = _decode_json(resp)
         
         if "error" in data:
             error = data["error"]
@@ -4,70 +4,192 @@
 Работает надежнее, чем простой парсинг HTML, так как выполняет JavaScript
 """
 
+import atexit
 import json
 import logging
+import os
+import queue
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from types import SimpleNamespace
 from typing import Any, Dict, List, Optional
 
+import requests
+from requests.adapters import HTTPAdapter
+
 # Настройки
 VK_GROUP_ID = 235512260
 VK_GROUP_URL = "https://vk.com/club235512260"
+# Wall-URL рендерит первые 20 постов на сервере, так что подгружать их
+# скроллом (AJAX) не нужно — всё есть в начальном HTML
+VK_WALL_URL = f"https://vk.com/wall-{VK_GROUP_ID}?offset=0&own=0"
+VK_API_VERSION = "5.199"
 POSTS_LIMIT = 20
 
+# Прекомпилированная регулярка и селекторы извлечения постов
+# (компилируются/интернируются один раз на модуль, а не в цикле)
+_WALL_RE = re.compile(r'wall-?\d+_(\d+)')
+_POST_TEXT_SELECTOR = ".wall_post_text, .post_text"
+_VIDEO_LINK_SELECTOR = "a[href*='video']"
+
+# Кэш запущенного браузера: холодный старт Chrome занимает секунды,
+# поэтому переиспользуем один драйвер между вызовами и пересоздаём его
+# только если сессия умерла
+_DRIVER_CACHE = {"driver": None}
+_DRIVER_LOCK = threading.Lock()
+
+
+def _quit_cached_driver() -> None:
+    """Закрыть закэшированный браузер (вызывается при выходе процесса)."""
+    driver = _DRIVER_CACHE.get("driver")
+    if driver is not None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        _DRIVER_CACHE["driver"] = None
+
+
+atexit.register(_quit_cached_driver)
+
 # Файл с учетными данными (логин и пароль)
 CREDENTIALS_FILE = Path("vk_credentials.txt")
 
+# Дисковый кэш распарсенных постов: повторный вызов в течение TTL
+# вообще не трогает VK (и тем более браузер)
+_CACHE_FILE = Path("vk_posts_cache.json")
+_CACHE_TTL = 300  # секунд
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
 )
 
 
+def _parse_kv_file(path: Path) -> Dict[str, str]:
+    """Разобрать файл вида key=value (комментарии с # игнорируются)."""
+    pairs = (
+        line.split("=", 1)
+        for line in path.read_text(encoding="utf-8").splitlines()
+        if "=" in line and not line.lstrip().startswith("#")
+    )
+    return {key.strip(): value.strip() for key, value in pairs}
+
+
 def load_credentials() -> Optional[Dict[str, str]]:
     """Загрузить логин и пароль из файла."""
     if CREDENTIALS_FILE.exists():
         try:
-            with open(CREDENTIALS_FILE, "r", encoding="utf-8") as f:
-                credentials = {}
-                for line in f:
-                    line = line.strip()
-                    if "=" in line and not line.startswith("#"):
-                        key, value = line.split("=", 1)
-                        credentials[key.strip()] = value.strip()
-                return credentials if "login" in credentials and "password" in credentials else None
+            credentials = _parse_kv_file(CREDENTIALS_FILE)
+            return credentials if "login" in credentials and "password" in credentials else None
         except Exception as e:
             logging.error("Ошибка при загрузке учетных данных: %s", e)
     return None
 
 
-def get_vk_posts_selenium() -> List[Dict[str, Any]]:
+def get_vk_posts_api(token: Optional[str] = None) -> List[Dict[str, Any]]:
     """
-    Получить посты через Selenium (автоматизация браузера).
-    Требует установки selenium и драйвера браузера.
-    Поддерживает авторизацию через логин/пароль или cookies.
+    Получить посты напрямую через VK API (wall.get) — один HTTP запрос
+    вместо запуска браузера (~200-500 мс против десятков секунд Selenium).
+    Selenium оставлен только как явный fallback, когда токена нет.
     """
+    if token is None:
+        token = os.getenv("VK_TOKEN", "")
+    if not token:
+        return []
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+    session.mount("https://", adapter)
+
     try:
-        from selenium import webdriver
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support.ui import WebDriverWait
-        from selenium.webdriver.support import expected_conditions as EC
-        from selenium.webdriver.chrome.options import Options
-        from selenium.webdriver.chrome.service import Service
-        from selenium.webdriver.common.keys import Keys
-    except ImportError:
+        resp = session.get(
+            "https://api.vk.com/method/wall.get",
+            params={
+                "access_token": token,
+                "v": VK_API_VERSION,
+                "owner_id": -VK_GROUP_ID,
+                "count": POSTS_LIMIT,
+            },
+            timeout=15,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+
+        if "error" in data:
+            error = data["error"]
+            logging.warning("VK API ошибка %s: %s",
+                            error.get("error_code", "?"),
+                            error.get("error_msg", "Unknown error"))
+            return []
+
+        posts = []
+        for item in data.get("response", {}).get("items", []):
+            posts.append({
+                "id": item.get("id"),
+                "text": item.get("text", "") or "",
+                "attachments": [
+                    {"type": "video"} for a in item.get("attachments", [])
+                    if a.get("type") == "video"
+                ],
+            })
+
+        logging.info("Получено %s пост(ов) через VK API.", len(posts))
+        return posts
+    except Exception as e:
+        logging.error("Ошибка при запросе VK API: %s", e)
+        return []
+
+
+# Selenium импортируется один раз при загрузке модуля; отсутствие пакета —
+# не ошибка (тогда работает только API-путь), поэтому просто сентинел
+try:
+    from selenium import webdriver as _webdriver
+    from selenium.webdriver.common.by import By as _By
+    from selenium.webdriver.support.ui import WebDriverWait as _WebDriverWait
+    from selenium.webdriver.support import expected_conditions as _EC
+    from selenium.webdriver.chrome.options import Options as _Options
+    from selenium.webdriver.chrome.service import Service as _Service
+    from selenium.webdriver.common.keys import Keys as _Keys
+    from selenium.common.exceptions import (
+        TimeoutException as _TimeoutException,
+        WebDriverException as _WebDriverException,
+    )
+    _SELENIUM = SimpleNamespace(
+        webdriver=_webdriver,
+        By=_By,
+        WebDriverWait=_WebDriverWait,
+        EC=_EC,
+        Options=_Options,
+        Service=_Service,
+        Keys=_Keys,
+        TimeoutException=_TimeoutException,
+        WebDriverException=_WebDriverException,
+    )
+except ImportError:
+    _SELENIUM = None
+
+
+def _import_selenium():
+    """Вернуть namespace с именами Selenium или None, если он не установлен."""
+    if _SELENIUM is None:
         logging.error(
             "Selenium не установлен! Установите:\n"
             "  pip3 install selenium\n"
             "  apt-get install chromium-chromedriver  # или скачайте ChromeDriver"
         )
-        return []
-    
-    # Настройка Chrome для обхода защиты VK
-    chrome_options = Options()
-    # НЕ используем headless - VK может блокировать headless браузеры
-    # chrome_options.add_argument("--headless")
+    return _SELENIUM
+
+
+def _build_chrome_options(sel, headless: bool = False):
+    """Собрать опции Chrome для обхода защиты VK."""
+    chrome_options = sel.Options()
+    # По умолчанию НЕ используем headless - VK может блокировать headless браузеры
+    if headless:
+        chrome_options.add_argument("--headless=new")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
@@ -77,254 +199,595 @@ def get_vk_posts_selenium() -> List[Dict[str, Any]]:
     chrome_options.add_argument(
         "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
     )
-    
+
     # Убираем признаки автоматизации
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option('useAutomationExtension', False)
-    
-    # Загружаем cookies если есть
-    cookies_file = Path("vk_cookies.txt")
-    cookies = {}
-    if cookies_file.exists():
+
+    # Парсер читает только data-post-id и текст — картинки, стили и шрифты
+    # не нужны, отключаем их, чтобы не качать лишние мегабайты
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.stylesheets": 2,
+        "profile.managed_default_content_settings.fonts": 2,
+        "profile.managed_default_content_settings.plugins": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    # Меньше фоновой активности Chrome в простое между вызовами
+    chrome_options.add_argument("--disable-background-networking")
+    chrome_options.add_argument("--disable-background-timer-throttling")
+    chrome_options.add_argument("--disable-renderer-backgrounding")
+    # eager: возвращаем управление после DOMContentLoaded, не дожидаясь
+    # подресурсов (посты есть в начальном HTML/XHR)
+    chrome_options.page_load_strategy = "eager"
+    # Performance-лог нужен, чтобы перехватывать XHR-ответы VK напрямую
+    # (см. _get_posts_from_xhr)
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return chrome_options
+
+
+def _kill_stale_chromedrivers() -> None:
+    """Прибить осиротевшие chromedriver-процессы от прошлых запусков.
+
+    finally/atexit не срабатывают после SIGKILL, и зомби-браузеры копятся,
+    отъедая CPU и RAM у следующих скрейпов. psutil опционален — без него
+    просто пропускаем зачистку.
+    """
+    try:
+        import psutil
+    except ImportError:
+        return
+    for proc in psutil.process_iter(["name", "cmdline"]):
         try:
-            with open(cookies_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if "=" in line:
-                        key, value = line.split("=", 1)
-                        cookies[key.strip()] = value.strip()
-        except Exception as e:
-            logging.warning("Не удалось загрузить cookies: %s", e)
-    
-    # Загружаем учетные данные (логин/пароль)
-    credentials = load_credentials()
-    
-    driver = None
+            if (proc.info["name"] == "chromedriver"
+                    and "--port=" in " ".join(proc.info["cmdline"] or [])):
+                proc.kill()
+                logging.info("Убит осиротевший chromedriver (pid=%s)", proc.pid)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+
+
+_STALE_SWEEP_DONE = False
+
+
+def _create_driver(sel, headless: bool = False):
+    """Создать и настроить новый экземпляр Chrome."""
+    global _STALE_SWEEP_DONE
+    if not _STALE_SWEEP_DONE:
+        _STALE_SWEEP_DONE = True
+        _kill_stale_chromedrivers()
+
+    # Keep-alive к chromedriver в Selenium 4 включён по умолчанию
+    # (RemoteConnection создаёт свой PoolManager на экземпляр), отдельной
+    # настройки не требуется.
+
+    # Явный Service: лог chromedriver в devnull, а atexit гарантирует
+    # остановку процесса даже если driver.quit() не был вызван
+    service = sel.Service(log_output=os.devnull)
+    driver = sel.webdriver.Chrome(service=service, options=_build_chrome_options(sel, headless))
+    atexit.register(service.stop)
+
+    # Убираем признаки автоматизации через JavaScript
+    driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+        'source': '''
+            Object.defineProperty(navigator, 'webdriver', {
+                get: () => undefined
+            });
+        '''
+    })
+
+    # Включаем сетевой домен CDP, чтобы Network.getResponseBody работал
     try:
-        # Запускаем браузер
-        logging.info("Запускаю Chrome...")
-        driver = webdriver.Chrome(options=chrome_options)
-        
-        # Убираем признаки автоматизации через JavaScript
-        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
-            'source': '''
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-            '''
+        driver.execute_cdp_cmd("Network.enable", {})
+    except Exception as e:
+        logging.debug("Network.enable не поддерживается: %s", e)
+
+    # Неявное ожидание выключено: с ним каждый промахнувшийся find_element
+    # в логин-блоке молча висел бы 15 секунд. Таймауты задаются явными
+    # WebDriverWait в местах, где элемент действительно должен появиться
+    driver.implicitly_wait(0)
+    driver.set_page_load_timeout(90)  # 90 секунд на загрузку страницы
+    return driver
+
+
+def _get_cached_driver(sel, headless: bool = False):
+    """Вернуть закэшированный браузер, пересоздав его при потере сессии."""
+    with _DRIVER_LOCK:
+        driver = _DRIVER_CACHE.get("driver")
+        if driver is not None:
+            try:
+                _ = driver.current_url  # проверка, что сессия жива
+            except sel.WebDriverException:
+                logging.info("Сессия Chrome потеряна, пересоздаю браузер...")
+                _quit_cached_driver()
+                driver = None
+
+        if driver is None:
+            logging.info("Запускаю Chrome...")
+            driver = _create_driver(sel, headless)
+            _DRIVER_CACHE["driver"] = driver
+        return driver
+
+
+def _add_cookies(driver, cookies):
+    """Добавить cookies авторизации в браузер.
+
+    Через CDP (Network.setCookies): одна wire-команда вместо N вызовов
+    add_cookie, и не нужна предварительная навигация на vk.com —
+    следующий driver.get() уже идёт авторизованным.
+    """
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {
+            "cookies": [
+                {"name": name, "value": value, "domain": ".vk.com", "path": "/"}
+                for name, value in cookies.items()
+            ]
         })
-        
-        # Увеличиваем таймауты
-        driver.implicitly_wait(15)
-        driver.set_page_load_timeout(90)  # 90 секунд на загрузку страницы
-        
-        # Авторизация: сначала пробуем через логин/пароль, потом через cookies
-        if credentials:
-            logging.info("Авторизуюсь через логин/пароль...")
+        logging.info("Cookies добавлены")
+    except Exception as e:
+        logging.warning(f"Не удалось добавить cookies через CDP: {e}")
+
+
+def _authorize(driver, sel, cookies, credentials):
+    """Авторизация: сначала через логин/пароль, потом через cookies."""
+    WebDriverWait = sel.WebDriverWait
+    EC = sel.EC
+    By = sel.By
+
+    if credentials:
+        logging.info("Авторизуюсь через логин/пароль...")
+        try:
+            # Дальше ждём не фиксированным sleep, а появлением поля логина
+            driver.get("https://vk.com/")
+
+            # Ищем поле ввода телефона/email
             try:
-                driver.get("https://vk.com/")
-                time.sleep(3)
-                
-                # Ищем поле ввода телефона/email
-                try:
-                    phone_input = WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "input[name='login'], input[type='text'], input[placeholder*='телефон'], input[placeholder*='email']"))
-                    )
-                    phone_input.clear()
-                    phone_input.send_keys(credentials["login"])
-                    logging.info("Логин введен")
-                except Exception as e:
-                    logging.warning(f"Не удалось найти поле логина: {e}")
-                
-                # Ищем поле ввода пароля
-                try:
-                    password_input = driver.find_element(By.CSS_SELECTOR, "input[name='password'], input[type='password']")
-                    password_input.clear()
-                    password_input.send_keys(credentials["password"])
-                    logging.info("Пароль введен")
-                except Exception as e:
-                    logging.warning(f"Не удалось найти поле пароля: {e}")
-                
-                # Ищем кнопку входа
-                try:
-                    login_button = driver.find_element(By.CSS_SELECTOR, "button[type='submit'], .login_button, button:contains('Войти')")
-                    login_button.click()
-                    logging.info("Кнопка входа нажата")
-                except Exception as e:
-                    # Пробуем нажать Enter
-                    try:
-                        password_input.send_keys(Keys.RETURN)
-                        logging.info("Нажата клавиша Enter")
-                    except:
-                        logging.warning(f"Не удалось нажать кнопку входа: {e}")
-                
-                # Ждем авторизации (проверяем, что мы не на странице входа)
-                time.sleep(5)
-                if "login" not in driver.current_url.lower() and "oauth" not in driver.current_url.lower():
-                    logging.info("✅ Авторизация через логин/пароль успешна")
-                else:
-                    logging.warning("Возможно, требуется двухфакторная аутентификация или капча")
-                    # Продолжаем - может быть, авторизация прошла, но есть редирект
+                phone_input = WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "input[name='login'], input[type='text'], input[placeholder*='телефон'], input[placeholder*='email']"))
+                )
+                phone_input.clear()
+                phone_input.send_keys(credentials["login"])
+                logging.info("Логин введен")
             except Exception as e:
-                logging.error(f"Ошибка при авторизации через логин/пароль: {e}")
-                # Пробуем через cookies
-                if cookies:
-                    logging.info("Пробую авторизацию через cookies...")
-                    driver.get("https://vk.com/")
-                    time.sleep(2)
-                    for name, value in cookies.items():
-                        try:
-                            driver.add_cookie({
-                                "name": name, 
-                                "value": value, 
-                                "domain": ".vk.com",
-                                "path": "/"
-                            })
-                        except Exception as e:
-                            logging.debug(f"Не удалось добавить cookie {name}: {e}")
-                    logging.info("Cookies добавлены")
-        elif cookies:
-            # Если нет логина/пароля, используем cookies
-            logging.info("Добавляю cookies...")
-            driver.get("https://vk.com/")
-            time.sleep(2)
-            for name, value in cookies.items():
-                try:
-                    driver.add_cookie({
-                        "name": name, 
-                        "value": value, 
-                        "domain": ".vk.com",
-                        "path": "/"
-                    })
-                except Exception as e:
-                    logging.debug(f"Не удалось добавить cookie {name}: {e}")
-            logging.info("Cookies добавлены")
-        else:
-            logging.warning("Нет ни логина/пароля, ни cookies. Пробую без авторизации...")
-        
-        # Переходим на страницу группы
-        logging.info("Загружаю страницу группы...")
-        try:
-            driver.get(VK_GROUP_URL)
-        except Exception as e:
-            # Если таймаут, но страница частично загрузилась, продолжаем
-            if "timeout" in str(e).lower():
-                logging.warning("Таймаут при загрузке страницы, но продолжаю парсинг...")
-                # Пробуем получить текущий URL - может быть, страница все же загрузилась
-                try:
-                    current_url = driver.current_url
-                    logging.info(f"Текущий URL: {current_url}")
-                except:
-                    pass
-            else:
-                raise
-        
-        # Ждем загрузки постов (VK может загружать их через AJAX)
-        logging.info("Жду загрузки постов...")
-        time.sleep(8)
-        
-        # Пробуем найти посты в DOM
-        posts = []
-        
-        # Прокручиваем страницу вниз, чтобы загрузить больше постов
-        logging.info("Прокручиваю страницу для загрузки постов...")
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(3)
-        driver.execute_script("window.scrollTo(0, 0);")  # Возвращаемся наверх
-        time.sleep(2)
-        
-        # Ищем посты по разным селекторам (VK использует разные классы)
-        post_selectors = [
-            "div[data-post-id]",  # Основной селектор
-            "div.wall_item",
-            "div.post",
-            "div[id*='post']",
-            "div[class*='wall_item']",
-            "div[class*='post']",
-            "a[href*='wall-']"  # Ссылки на посты
-        ]
-        
-        post_elements = []
-        for selector in post_selectors:
+                logging.warning(f"Не удалось найти поле логина: {e}")
+
+            # Ищем поле ввода пароля
             try:
-                elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                if elements:
-                    post_elements = elements
-                    logging.info(f"✅ Найдено {len(elements)} элементов через селектор: {selector}")
-                    break
+                password_input = WebDriverWait(driver, 3).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "input[name='password'], input[type='password']"))
+                )
+                password_input.clear()
+                password_input.send_keys(credentials["password"])
+                logging.info("Пароль введен")
             except Exception as e:
-                logging.debug(f"Селектор {selector} не сработал: {e}")
-                continue
-        
-        if not post_elements:
-            # Пробуем найти любые ссылки на посты
-            logging.info("Пробую найти посты через ссылки...")
-            all_links = driver.find_elements(By.TAG_NAME, "a")
-            post_links = [link for link in all_links if "wall-" in link.get_attribute("href") or ""]
-            if post_links:
-                post_elements = post_links[:POSTS_LIMIT]
-                logging.info(f"✅ Найдено {len(post_elements)} постов через ссылки")
-        
-        # Извлекаем данные из постов
-        for elem in post_elements[:POSTS_LIMIT]:
+                logging.warning(f"Не удалось найти поле пароля: {e}")
+
+            # Ищем кнопку входа (XPath: CSS-псевдокласс :contains не существует)
             try:
-                # Получаем post_id
-                post_id_attr = elem.get_attribute("data-post-id")
-                if not post_id_attr:
-                    # Пробуем найти в ссылке
-                    link = elem.find_element(By.CSS_SELECTOR, "a[href*='wall']")
-                    if link:
-                        href = link.get_attribute("href")
-                        match = re.search(r'wall-?\d+_(\d+)', href)
-                        if match:
-                            post_id_attr = match.group(1)
-                
-                if not post_id_attr:
-                    continue
-                
-                post_id = int(post_id_attr) if post_id_attr.isdigit() else 0
-                if not post_id:
-                    continue
-                
-                # Получаем текст
-                try:
-                    text_elem = elem.find_element(By.CSS_SELECTOR, ".wall_post_text, .post_text")
-                    text = text_elem.text.strip()
-                except:
-                    text = ""
-                
-                # Ищем видео
-                attachments = []
+                login_button = WebDriverWait(driver, 3).until(
+                    EC.element_to_be_clickable((By.XPATH, "//button[@type='submit' or contains(@class, 'login_button') or contains(., 'Войти')]"))
+                )
+                login_button.click()
+                logging.info("Кнопка входа нажата")
+            except Exception as e:
+                # Пробуем нажать Enter
                 try:
-                    video_elem = elem.find_element(By.CSS_SELECTOR, "a[href*='video']")
-                    if video_elem:
-                        attachments.append({"type": "video"})
+                    password_input.send_keys(sel.Keys.RETURN)
+                    logging.info("Нажата клавиша Enter")
                 except:
-                    pass
-                
+                    logging.warning(f"Не удалось нажать кнопку входа: {e}")
+
+            # Ждем авторизации (уход со страницы входа), но не дольше 10 секунд
+            try:
+                WebDriverWait(driver, 10).until(
+                    lambda d: "login" not in d.current_url.lower()
+                    and "oauth" not in d.current_url.lower()
+                )
+            except sel.TimeoutException:
+                pass
+            if "login" not in driver.current_url.lower() and "oauth" not in driver.current_url.lower():
+                logging.info("✅ Авторизация через логин/пароль успешна")
+            else:
+                logging.warning("Возможно, требуется двухфакторная аутентификация или капча")
+                # Продолжаем - может быть, авторизация прошла, но есть редирект
+        except Exception as e:
+            logging.error(f"Ошибка при авторизации через логин/пароль: {e}")
+            # Пробуем через cookies
+            if cookies:
+                logging.info("Пробую авторизацию через cookies...")
+                _add_cookies(driver, cookies)
+    elif cookies:
+        # Если нет логина/пароля, используем cookies
+        logging.info("Добавляю cookies...")
+        _add_cookies(driver, cookies)
+    else:
+        logging.warning("Нет ни логина/пароля, ни cookies. Пробую без авторизации...")
+
+
+def _get_posts_from_xhr(driver) -> List[Dict[str, Any]]:
+    """Достать посты из перехваченного XHR-ответа VK, минуя DOM.
+
+    Стена грузится XHR-запросом, который уже возвращает структурированный
+    JSON; ждать, пока браузер отрисует его в HTML, и выцарапывать обратно —
+    лишний круг. Через performance-лог находим подходящий ответ и забираем
+    его тело одной CDP-командой. При любой неудаче возвращаем [] и парсер
+    идёт обычным путём через DOM.
+    """
+    posts = []
+    try:
+        for entry in driver.get_log("performance"):
+            message = json.loads(entry["message"]).get("message", {})
+            if message.get("method") != "Network.responseReceived":
+                continue
+            params = message.get("params", {})
+            response_url = params.get("response", {}).get("url", "")
+            if "al_wall.php" not in response_url and "wall.get" not in response_url:
+                continue
+            try:
+                body = driver.execute_cdp_cmd(
+                    "Network.getResponseBody",
+                    {"requestId": params["requestId"]},
+                )["body"]
+                data = json.loads(body)
+            except Exception:
+                continue  # тело уже вытеснено из буфера или это не JSON
+
+            for item in data.get("response", {}).get("items", []):
                 posts.append({
-                    "id": post_id,
-                    "text": text,
-                    "attachments": attachments
+                    "id": item.get("id"),
+                    "text": item.get("text", "") or "",
+                    "attachments": [
+                        {"type": "video"} for a in item.get("attachments", [])
+                        if a.get("type") == "video"
+                    ],
                 })
-            except Exception as e:
-                logging.debug("Ошибка при извлечении поста: %s", e)
+            if posts:
+                break
+    except Exception as e:
+        logging.debug("Перехват XHR не удался: %s", e)
+    return posts[:POSTS_LIMIT]
+
+
+def _parse_page_source(html: str) -> List[Dict[str, Any]]:
+    """Разобрать HTML стены локально (selectolax, если установлен, иначе bs4).
+
+    Запасной путь на случай, когда execute_script ничего не вернул:
+    один page_source вместо сотни wire-команд find_element/get_attribute.
+    """
+    raw_posts = []
+    try:
+        from selectolax.parser import HTMLParser  # C-парсер, на порядок быстрее
+        tree = HTMLParser(html)
+        for node in tree.css("div[data-post-id]")[:POSTS_LIMIT]:
+            text_node = node.css_first(_POST_TEXT_SELECTOR.replace(", ", ","))
+            link_node = node.css_first("a[href*='wall']")
+            raw_posts.append({
+                "id": node.attributes.get("data-post-id") or "",
+                "href": (link_node.attributes.get("href") if link_node else "") or "",
+                "text": text_node.text(strip=True) if text_node else "",
+                "hasVideo": node.css_first(_VIDEO_LINK_SELECTOR) is not None,
+            })
+        return raw_posts
+    except ImportError:
+        pass
+
+    try:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, "html.parser")
+        for node in soup.select("div[data-post-id]")[:POSTS_LIMIT]:
+            text_node = node.select_one(_POST_TEXT_SELECTOR)
+            link_node = node.select_one("a[href*='wall']")
+            raw_posts.append({
+                "id": node.get("data-post-id") or "",
+                "href": (link_node.get("href") if link_node else "") or "",
+                "text": text_node.get_text(strip=True) if text_node else "",
+                "hasVideo": node.select_one(_VIDEO_LINK_SELECTOR) is not None,
+            })
+    except ImportError:
+        logging.debug("Ни selectolax, ни bs4 не установлены — локальный парсинг пропущен")
+    return raw_posts
+
+
+def _scrape_wall(driver, sel, url):
+    """Загрузить стену по url и извлечь посты из DOM."""
+    WebDriverWait = sel.WebDriverWait
+    EC = sel.EC
+    By = sel.By
+
+    # Переходим на страницу группы
+    logging.info("Загружаю страницу группы...")
+    try:
+        driver.get(url)
+    except sel.TimeoutException:
+        # Стратегия eager + частично загруженный DOM: останавливаем
+        # дальнейшую загрузку и парсим то, что уже пришло
+        logging.warning("Таймаут при загрузке страницы, останавливаю загрузку и парсю как есть...")
+        driver.execute_script("window.stop();")
+
+    # Ждем загрузки постов (VK может загружать их через AJAX) —
+    # но только до появления первого поста, а не фиксированные 8 секунд
+    logging.info("Жду загрузки постов...")
+    try:
+        WebDriverWait(driver, 15).until(
+            EC.presence_of_element_located(
+                (By.CSS_SELECTOR, "div[data-post-id], a[href*='wall-']")
+            )
+        )
+        # Посты уже в DOM — дальнейшие подресурсы страницы не нужны
+        driver.execute_script("window.stop();")
+    except sel.TimeoutException:
+        logging.warning("Посты не появились за 15 секунд, пробую парсить как есть...")
+        driver.execute_script("window.stop();")
+
+    # Сначала пробуем забрать посты из перехваченного XHR — если VK отдал
+    # JSON, DOM можно не трогать вообще
+    posts = _get_posts_from_xhr(driver)
+    if posts:
+        logging.info("Получено %s пост(ов) из XHR-ответа VK.", len(posts))
+        return posts
+
+    # Ищем посты одним составным селектором: Blink обходит DOM один раз
+    # вместо семи, а подстрочные селекторы [id*='post'] и [class*='post']
+    # убраны — они дорогие и дают ложные срабатывания
+    post_selectors = [
+        "div[data-post-id]",  # Основной селектор
+        "div.wall_item",
+        "div.post",
+        "div[class*='wall_item']",
+        "a[href*='wall-']"  # Ссылки на посты
+    ]
+
+    post_elements = []
+    try:
+        post_elements = driver.find_elements(By.CSS_SELECTOR, ", ".join(post_selectors))
+        if post_elements:
+            logging.info(f"✅ Найдено {len(post_elements)} элементов постов")
+    except Exception as e:
+        logging.debug(f"Составной селектор не сработал: {e}")
+
+    raw_posts = None
+    if not post_elements:
+        # Пробуем найти ссылки на посты одним execute_script: перебор всех
+        # <a> через find_elements/get_attribute — это тысячи wire-команд
+        # к chromedriver, а так — одна
+        logging.info("Пробую найти посты через ссылки...")
+        try:
+            post_hrefs = driver.execute_script(
+                "return Array.from(document.querySelectorAll(\"a[href*='wall-']\"))"
+                ".slice(0, arguments[0]).map(a => a.href);",
+                POSTS_LIMIT,
+            )
+        except sel.WebDriverException:
+            # execute_script может быть недоступен (CSP/прокси-драйвер) —
+            # XPath фильтрует по href на стороне драйвера, без перебора
+            # всех <a> из Python
+            links = driver.find_elements(
+                By.XPATH, "//a[contains(@href, 'wall-')]"
+            )[:POSTS_LIMIT]
+            post_hrefs = [link.get_attribute("href") for link in links]
+        if post_hrefs:
+            logging.info(f"✅ Найдено {len(post_hrefs)} постов через ссылки")
+            # Ссылки и есть результат: id из них достанет _WALL_RE ниже,
+            # ещё раз обходить DOM не нужно
+            raw_posts = [
+                {"id": "", "href": href, "text": "", "hasVideo": False}
+                for href in post_hrefs
+            ]
+
+    # Извлекаем данные из постов одним execute_script: каждый
+    # get_attribute/find_element — это отдельный HTTP round-trip к
+    # chromedriver (~14 мс), а так вся выборка приходит одним JSON.
+    # Если execute_script недоступен (CSP/прокси-драйвер), не падаем,
+    # а уходим ниже на локальный разбор page_source.
+    if raw_posts is None:
+        try:
+            raw_posts = driver.execute_script(
+                """
+                var limit = arguments[0];
+                var textSelector = arguments[1];
+                var videoSelector = arguments[2];
+                var nodes = Array.from(document.querySelectorAll('div[data-post-id]'));
+                if (nodes.length) {
+                    return nodes.slice(0, limit).map(function (e) {
+                        var textEl = e.querySelector(textSelector);
+                        var linkEl = e.querySelector("a[href*='wall']");
+                        return {
+                            id: e.getAttribute('data-post-id') || '',
+                            href: (linkEl && linkEl.href) || '',
+                            text: (textEl && textEl.innerText) || '',
+                            hasVideo: !!e.querySelector(videoSelector)
+                        };
+                    });
+                }
+                return Array.from(document.querySelectorAll("a[href*='wall-']"))
+                    .slice(0, limit)
+                    .map(function (a) {
+                        return {id: '', href: a.href || '', text: a.innerText || '', hasVideo: false};
+                    });
+                """,
+                POSTS_LIMIT,
+                _POST_TEXT_SELECTOR,
+                _VIDEO_LINK_SELECTOR,
+            )
+        except sel.WebDriverException:
+            raw_posts = None
+
+    if not raw_posts:
+        # JS-извлечение ничего не дало — забираем page_source одним вызовом
+        # и парсим локально C-парсером
+        logging.info("Пробую разобрать page_source локально...")
+        raw_posts = _parse_page_source(driver.page_source)
+
+    for raw in raw_posts or []:
+        try:
+            # Получаем post_id: из data-атрибута или из ссылки на пост
+            post_id_attr = raw.get("id") or ""
+            if not post_id_attr:
+                match = _WALL_RE.search(raw.get("href") or "")
+                if match:
+                    post_id_attr = match.group(1)
+
+            post_id = int(post_id_attr) if post_id_attr.isdigit() else 0
+            if not post_id:
                 continue
-        
+
+            text = (raw.get("text") or "").strip()
+
+            attachments = []
+            if raw.get("hasVideo"):
+                attachments.append({"type": "video"})
+
+            posts.append({
+                "id": post_id,
+                "text": text,
+                "attachments": attachments
+            })
+        except Exception as e:
+            logging.debug("Ошибка при извлечении поста: %s", e)
+            continue
+
+    return posts
+
+
+def get_vk_posts_selenium(headless: bool = False, use_login: bool = True) -> List[Dict[str, Any]]:
+    """
+    Получить посты через Selenium (автоматизация браузера).
+    Требует установки selenium и драйвера браузера.
+    Поддерживает авторизацию через логин/пароль или cookies;
+    use_login=False отключает авторизацию по логину/паролю (останутся cookies),
+    headless=True запускает Chrome без окна (VK может такое блокировать).
+    """
+    # Сначала смотрим свежий дисковый кэш
+    try:
+        if _CACHE_FILE.exists() and time.time() - _CACHE_FILE.stat().st_mtime < _CACHE_TTL:
+            posts = json.loads(_CACHE_FILE.read_text(encoding="utf-8"))
+            logging.info("Посты взяты из кэша %s (%s шт).", _CACHE_FILE, len(posts))
+            return posts
+    except Exception as e:
+        logging.debug("Не удалось прочитать кэш постов: %s", e)
+
+    sel = _import_selenium()
+    if sel is None:
+        return []
+
+    # Загружаем cookies если есть
+    cookies_file = Path("vk_cookies.txt")
+    cookies = {}
+    if cookies_file.exists():
+        try:
+            cookies = _parse_kv_file(cookies_file)
+        except Exception as e:
+            logging.warning("Не удалось загрузить cookies: %s", e)
+
+    # Загружаем учетные данные (логин/пароль)
+    credentials = load_credentials() if use_login else None
+
+    driver = None
+    try:
+        # Берём браузер из кэша; пересоздаём только если сессия потеряна
+        driver = _get_cached_driver(sel, headless)
+
+        _authorize(driver, sel, cookies, credentials)
+
+        posts = _scrape_wall(driver, sel, VK_WALL_URL)
         logging.info(f"Получено {len(posts)} постов через Selenium")
+
+        # Обновляем кэш атомарно (os.replace), чтобы параллельный читатель
+        # не увидел недописанный файл
+        if posts:
+            try:
+                tmp_file = _CACHE_FILE.with_suffix(".json.tmp")
+                tmp_file.write_text(json.dumps(posts, ensure_ascii=False), encoding="utf-8")
+                os.replace(tmp_file, _CACHE_FILE)
+            except Exception as e:
+                logging.debug("Не удалось записать кэш постов: %s", e)
+
         return posts
-        
+
     except Exception as e:
         logging.error("Ошибка при работе с Selenium: %s", e, exc_info=True)
         return []
     finally:
+        # Браузер не закрываем — чистим состояние и оставляем для
+        # следующего вызова; quit() только если сессия сломалась
         if driver:
-            driver.quit()
+            try:
+                driver.delete_all_cookies()
+                driver.get("about:blank")
+            except Exception:
+                logging.info("Не удалось сбросить состояние браузера, закрываю его...")
+                _quit_cached_driver()
+
+
+def get_vk_posts_many(urls: List[str], pool_size: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Спарсить несколько стен VK параллельно через пул браузеров.
+
+    Размер пула задаётся параметром или переменной окружения VK_POOL_SIZE
+    (по умолчанию 3). Для M групп и пула из K браузеров суммарное время
+    падает с M×t до ceil(M/K)×t.
+    """
+    results: Dict[str, List[Dict[str, Any]]] = {url: [] for url in urls}
+    if not urls:
+        return results
+
+    sel = _import_selenium()
+    if sel is None:
+        return results
+
+    if pool_size is None:
+        pool_size = int(os.getenv("VK_POOL_SIZE", "3"))
+    pool_size = max(1, min(pool_size, len(urls)))
+
+    cookies_file = Path("vk_cookies.txt")
+    cookies = {}
+    if cookies_file.exists():
+        try:
+            cookies = _parse_kv_file(cookies_file)
+        except Exception as e:
+            logging.warning("Не удалось загрузить cookies: %s", e)
+    credentials = load_credentials()
+
+    # Создаём пул браузеров; авторизуем каждый один раз
+    drivers: "queue.Queue" = queue.Queue()
+    created = []
+    try:
+        for _ in range(pool_size):
+            driver = _create_driver(sel)
+            _authorize(driver, sel, cookies, credentials)
+            created.append(driver)
+            drivers.put(driver)
+
+        def worker(url: str):
+            driver = drivers.get()
+            try:
+                return url, _scrape_wall(driver, sel, url)
+            except Exception as e:
+                logging.error("Ошибка при парсинге %s: %s", url, e)
+                return url, []
+            finally:
+                drivers.put(driver)
+
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            for url, posts in executor.map(worker, urls):
+                results[url] = posts
+    finally:
+        for driver in created:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    return results
 
 
 if __name__ == "__main__":
-    print("Тестирование парсера VK через Selenium...")
-    posts = get_vk_posts_selenium()
+    print("Тестирование парсера VK (API, затем Selenium)...")
+    posts = get_vk_posts_api()
+    if not posts:
+        print("VK API не вернул посты, пробую Selenium...")
+        posts = get_vk_posts_selenium()
     print(f"Найдено постов: {len(posts)}")
     for post in posts[:3]:
         print(f"  Пост ID: {post.get('id')}, Текст: {post.get('text', '')[:50]}...")
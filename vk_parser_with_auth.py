@@ -7,10 +7,43 @@
 import json
 import logging
 import re
+from io import BytesIO
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+
+# Быстрый разбор JSON, если установлен orjson (Rust-парсер)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(data):
+    """Распарсить JSON самым быстрым доступным парсером."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+from bs4 import BeautifulSoup
+
+# lxml (C-парсер libxml2) разбирает страницы VK в разы быстрее встроенного
+# html.parser; если он не установлен, откатываемся на чистый Python
+try:
+    import lxml  # noqa: F401
+    _BS_PARSER = "lxml"
+except ImportError:
+    _BS_PARSER = "html.parser"
+
+# selectolax (обёртка над C-парсером Lexbor) ещё быстрее: не создаёт
+# Python-объект на каждый тег; опционален, bs4-путь остаётся запасным
+try:
+    from selectolax.parser import HTMLParser as _SelectolaxHTML
+except ImportError:
+    _SelectolaxHTML = None
 
 # Настройки
 VK_GROUP_ID = 235512260
@@ -21,29 +54,249 @@ POSTS_LIMIT = 20
 # Файл для хранения cookies
 COOKIES_FILE = Path("vk_cookies.txt")
 
+# Прекомпилированные регулярки: парсер живёт в долгоиграющем процессе,
+# и компилировать одни и те же паттерны на каждом цикле опроса незачем
+_GROUP_DOMAIN_RE = re.compile(r"/([^/]+)$")
+_WALL_LINK_RE = re.compile(r'wall-?\d+_\d+')
+_WALL_ID_RE = re.compile(r'wall-?\d+_(\d+)')
+_WALL_HREF_RE = re.compile(r"wall")
+_VIDEO_HREF_RE = re.compile(r"video")
+# Один проход вместо нескольких `in`-сканов по телу/URL
+_LOGIN_URL_RE = re.compile(r"login|oauth")
+_AUTH_OK_RE = re.compile(r"id=|user_id|profile|feed|новости")
+# Якоря, после которых в скриптах страницы лежит JSON со стеной
+_WALL_JSON_ANCHORS = ("var wall", "window.wall", '"wall":')
+
+def _extract_json_after(text: str, anchor: str) -> Optional[str]:
+    """Вырезать JSON-объект, идущий после якоря, балансом скобок.
+
+    Регулярка с DOTALL и .*? по многомегабайтному HTML бэктрекает через
+    весь документ; здесь якорь ищется C-шным str.find, а дальше один
+    линейный проход со счётчиком скобок (с учётом строк и экранирования).
+    """
+    idx = text.find(anchor)
+    if idx < 0:
+        return None
+    start = text.find("{", idx)
+    if start < 0:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == '"':
+            in_string = not in_string
+        elif not in_string:
+            if ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return text[start:i + 1]
+    return None
+
+
+def _class_contains(*substrings):
+    """Фильтр классов для bs4: простой поиск подстроки вместо регулярки.
+
+    Регулярки вида .*post.* прогонялись движком re по каждому классу
+    каждого тега документа с бэктрекингом на ведущем .*; здесь та же
+    проверка делается обычным `in`.
+    """
+    def matcher(css_class):
+        return css_class is not None and any(s in css_class.lower() for s in substrings)
+    return matcher
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
 )
 
 
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Referer": "https://vk.com/",
+}
+
+# Одна сессия на процесс: keep-alive переиспользует TCP/TLS-соединения
+# к vk.com и m.vk.com между запросами и между циклами опроса
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(total=2, backoff_factor=0.3),
+))
+_SESSION.headers.update(HEADERS)
+_COOKIES_MTIME: Optional[float] = None
+
+# Мемоизация распарсенных cookies по mtime файла: при минутном опросе
+# файл практически не меняется, так что горячий путь — возврат dict
+_COOKIES_CACHE: Optional[tuple] = None  # (st_mtime_ns, cookies)
+
+# Потолок на читаемый HTML: постам хватает начала страницы
+_MAX_HTML_BYTES = 2_000_000
+
+
 def load_cookies() -> Optional[Dict[str, str]]:
-    """Загрузить cookies из файла."""
+    """Загрузить cookies из файла (с кэшем по mtime файла)."""
+    global _COOKIES_CACHE
     if COOKIES_FILE.exists():
         try:
-            with open(COOKIES_FILE, "r", encoding="utf-8") as f:
-                cookies = {}
-                for line in f:
-                    line = line.strip()
-                    if "=" in line:
-                        key, value = line.split("=", 1)
-                        cookies[key.strip()] = value.strip()
-                return cookies if cookies else None
+            mtime_ns = COOKIES_FILE.stat().st_mtime_ns
+            if _COOKIES_CACHE and _COOKIES_CACHE[0] == mtime_ns:
+                return _COOKIES_CACHE[1]
+            # splitlines + dict-генератор: вся итерация выполняется в C
+            pairs = (
+                line.split("=", 1)
+                for line in COOKIES_FILE.read_text(encoding="utf-8").splitlines()
+                if "=" in line
+            )
+            cookies = {key.strip(): value.strip() for key, value in pairs}
+            result = cookies if cookies else None
+            _COOKIES_CACHE = (mtime_ns, result)
+            return result
         except Exception as e:
             logging.error("Ошибка при загрузке cookies: %s", e)
     return None
 
 
+def _read_capped(resp: requests.Response, limit: int = _MAX_HTML_BYTES) -> str:
+    """Прочитать тело ответа потоково, не больше limit байт.
+
+    Страница группы может весить сотни КБ; всё, что дальше лимита,
+    для парсинга не нужно, а соединение сразу возвращается в пул.
+    """
+    try:
+        raw = resp.raw.read(limit, decode_content=True)
+        return raw.decode(resp.encoding or "utf-8", errors="replace")
+    finally:
+        resp.close()
+
+
+def _get_session() -> requests.Session:
+    """Вернуть общую сессию, перечитав cookies только при изменении файла."""
+    global _COOKIES_MTIME
+    try:
+        mtime = COOKIES_FILE.stat().st_mtime
+    except OSError:
+        mtime = None
+    if mtime != _COOKIES_MTIME:
+        _COOKIES_MTIME = mtime
+        _SESSION.cookies.clear()
+        cookies = load_cookies()
+        if cookies:
+            _SESSION.cookies.update(cookies)
+    return _SESSION
+
+
+def _parse_mobile_posts_selectolax(html: str) -> List[Dict[str, Any]]:
+    """Разобрать мобильную стену через selectolax.
+
+    Нам нужны только id, кусок текста и флаг видео на пост — для такого
+    доступа C-дерево selectolax на порядок быстрее объектной модели bs4.
+    """
+    tree = _SelectolaxHTML(html)
+    posts: List[Dict[str, Any]] = []
+    seen_ids = set()
+    for node in tree.css('a[href*="wall-"]'):
+        match = _WALL_ID_RE.search(node.attributes.get("href") or "")
+        if not match:
+            continue
+        post_id = int(match.group(1))
+        if post_id in seen_ids:
+            continue
+        seen_ids.add(post_id)
+
+        # Поднимаемся к родительскому div поста (как в bs4-ветке)
+        post_elem = node
+        for _ in range(5):
+            if post_elem.parent is None:
+                break
+            post_elem = post_elem.parent
+            if post_elem.tag == "div":
+                break
+
+        text = ""
+        attachments = []
+        if post_elem is not None:
+            text_node = post_elem.css_first('div[class*="text"], div[class*="content"]')
+            if text_node is not None:
+                text = text_node.text(strip=True)
+            if post_elem.css_first('a[href*="video"]') is not None:
+                attachments.append({"type": "video"})
+
+        posts.append({"id": post_id, "text": text, "attachments": attachments})
+        if len(posts) >= POSTS_LIMIT:
+            break
+    return posts
+
+
+def _parse_mobile_posts_iterparse(html: str) -> List[Dict[str, Any]]:
+    """Потоковый разбор мобильной стены через lxml.etree.iterparse.
+
+    Вместо построения полного дерева элементы <a> обрабатываются по мере
+    разбора и сразу освобождаются, так что пиковая память не зависит от
+    размера документа, а выход по POSTS_LIMIT обрывает разбор досрочно.
+    """
+    from lxml import etree
+
+    posts: List[Dict[str, Any]] = []
+    seen_ids = set()
+    # encoding обязателен: без него HTML-парсер угадывает кодировку по
+    # meta-тегу, а мы кодируем строку в utf-8 сами
+    context = etree.iterparse(
+        BytesIO(html.encode("utf-8")), html=True, events=("end",), tag="a",
+        encoding="utf-8",
+    )
+    for _, elem in context:
+        match = _WALL_ID_RE.search(elem.get("href") or "")
+        if match:
+            post_id = int(match.group(1))
+            if post_id not in seen_ids:
+                seen_ids.add(post_id)
+
+                # Поднимаемся к родительскому div поста (как в других ветках)
+                post_elem = elem
+                for _ in range(5):
+                    parent = post_elem.getparent()
+                    if parent is None:
+                        break
+                    post_elem = parent
+                    if post_elem.tag == "div":
+                        break
+
+                # У etree._Element нет text_content() (он только у
+                # lxml.html) — собираем текст через itertext()
+                text = " ".join("".join(post_elem.itertext()).split())[:500]
+                attachments = []
+                for link in post_elem.iter("a"):
+                    if "video" in (link.get("href") or ""):
+                        attachments.append({"type": "video"})
+                        break
+
+                posts.append({"id": post_id, "text": text, "attachments": attachments})
+                if len(posts) >= POSTS_LIMIT:
+                    break
+
+                # Освобождаем обработанный пост и всё до него. Чистить на
+                # каждом <a> нельзя: div поста ещё открыт, и clear() снёс бы
+                # его текст и ранние дочерние узлы до того, как мы их прочли
+                post_elem.clear()
+                parent = post_elem.getparent()
+                if parent is not None:
+                    while post_elem.getprevious() is not None:
+                        del parent[0]
+    return posts
+
+
 def get_vk_posts_with_auth() -> List[Dict[str, Any]]:
     """
     Получить посты через парсинг страницы с авторизацией.
@@ -62,114 +315,138 @@ def get_vk_posts_with_auth() -> List[Dict[str, Any]]:
         )
         return []
     
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-        "Referer": "https://vk.com/",
-    }
-    
-    session = requests.Session()
-    session.cookies.update(cookies)
-    session.headers.update(headers)
+    session = _get_session()
     
     try:
-        # Проверяем авторизацию - пробуем загрузить главную страницу
-        logging.info("Проверяю авторизацию...")
-        main_resp = session.get("https://vk.com/feed", timeout=20, allow_redirects=True)
+        # Определяем домен группы из VK_GROUP_URL, например club235512260
+        group_match = _GROUP_DOMAIN_RE.search(VK_GROUP_URL)
+        group_domain = group_match.group(1) if group_match else f"club{VK_GROUP_ID}"
+        mobile_url = f"https://m.vk.com/{group_domain}"
+
+        # Проверка авторизации и страница группы не зависят друг от друга —
+        # запускаем оба GET параллельно, критический путь сокращается
+        # с двух RTT до одного max(RTT)
+        logging.info("Проверяю авторизацию и загружаю мобильную версию группы...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            feed_future = executor.submit(
+                session.get, "https://vk.com/feed",
+                timeout=20, allow_redirects=True, stream=True,
+            )
+            mobile_future = executor.submit(
+                session.get, mobile_url,
+                timeout=20, allow_redirects=True, stream=True,
+            )
+            main_resp = feed_future.result()
+            # Для проверки авторизации хватает первых 16 КБ ответа:
+            # редирект виден по URL, маркеры — в начале страницы
+            main_html = _read_capped(main_resp, 16_384)
+            mobile_resp = mobile_future.result()
+            mobile_html = _read_capped(mobile_resp)
         
         # Проверяем, не редиректнуло ли на страницу входа
-        if "login" in main_resp.url.lower() or "oauth" in main_resp.url.lower():
+        if _LOGIN_URL_RE.search(main_resp.url.lower()):
             logging.error("❌ Не удалось авторизоваться - редирект на страницу входа")
             logging.error("Проверьте cookies в vk_cookies.txt - они должны быть актуальными")
             return []
         
         # Проверяем наличие признаков авторизованной страницы
-        auth_indicators = ["id=", "user_id", "profile", "feed", "новости"]
-        is_authorized = any(indicator in main_resp.text.lower() for indicator in auth_indicators)
+        # Одна прекомпилированная альтернация вместо пяти in-сканов тела
+        is_authorized = _AUTH_OK_RE.search(main_html.lower()) is not None
         
         if not is_authorized:
             logging.warning("Не уверен в авторизации, но продолжаю...")
         else:
             logging.info("✅ Авторизация успешна")
         
-        # Загружаем страницу группы (мобильная версия)
-        logging.info("Загружаю мобильную версию группы...")
-        # Определяем домен группы из VK_GROUP_URL, например club235512260
-        group_match = re.search(r"/([^/]+)$", VK_GROUP_URL)
-        group_domain = group_match.group(1) if group_match else f"club{VK_GROUP_ID}"
-        mobile_url = f"https://m.vk.com/{group_domain}"
-        mobile_resp = session.get(mobile_url, timeout=20, allow_redirects=True)
-        
         # Проверяем, что мы на странице группы (не редирект на логин)
-        if "login" in mobile_resp.url.lower() or "oauth" in mobile_resp.url.lower():
+        if _LOGIN_URL_RE.search(mobile_resp.url.lower()):
             logging.error("❌ Не удалось получить доступ к группе - редирект на страницу входа")
             logging.error("Возможно, вы не участник группы tennisprimesport")
             logging.error("Или cookies истекли - обновите их в vk_cookies.txt")
             return []
         
         # Проверяем, что мы на правильной странице
-        if group_domain.lower() not in mobile_resp.url.lower() and "wall" not in mobile_resp.text.lower():
+        if group_domain.lower() not in mobile_resp.url.lower() and "wall" not in mobile_html.lower():
             logging.warning("Странная страница получена, но продолжаю парсинг...")
         
         logging.info("✅ Страница группы загружена, начинаю парсинг...")
         
         # Используем мобильную версию VK - она проще для парсинга
         logging.info("Пробую мобильную версию VK...")
-        mobile_url = f"https://m.vk.com/{group_domain}"
         if "m.vk.com" not in mobile_resp.url:
             # Если еще не загрузили мобильную версию, загружаем
-            mobile_resp = session.get(mobile_url, timeout=20)
+            mobile_resp = session.get(mobile_url, timeout=20, stream=True)
+            mobile_html = _read_capped(mobile_resp)
         
         posts = []
         
         # Пробуем найти данные в мобильной версии через HTML парсинг
-        if mobile_resp.status_code == 200:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(mobile_resp.text, "html.parser")
+        if mobile_resp.status_code == 200 and _SelectolaxHTML is not None:
+            posts = _parse_mobile_posts_selectolax(mobile_html)
+            if posts:
+                # Мобильная версия дала посты — остальные ветки не нужны
+                logging.info(f"✅ Найдено {len(posts)} постов через selectolax")
+                return posts
+
+        if not posts and mobile_resp.status_code == 200 and _BS_PARSER == "lxml":
+            # Потоковый lxml-путь: O(окна) памяти вместо O(дерева)
+            try:
+                posts = _parse_mobile_posts_iterparse(mobile_html)
+            except Exception as e:
+                logging.debug("iterparse не сработал: %s", e)
+            if posts:
+                logging.info(f"✅ Найдено {len(posts)} постов через lxml.iterparse")
+                return posts
+
+        if not posts and mobile_resp.status_code == 200:
+            soup = BeautifulSoup(mobile_html, _BS_PARSER)
             
+            # Все id постов собираем одним проходом C-движка по сырому HTML;
+            # dict.fromkeys отбрасывает дубли, сохраняя порядок
+            unique_ids = [int(pid) for pid in
+                          dict.fromkeys(_WALL_ID_RE.findall(mobile_html))][:POSTS_LIMIT]
+
             # В мобильной версии посты обычно в div с классом wall_item или в ссылках
-            # Ищем все ссылки на посты
-            post_links = soup.find_all("a", href=re.compile(r'wall-?\d+_\d+'))
-            
-            seen_ids = set()
-            for link in post_links[:POSTS_LIMIT * 2]:  # Берем больше, так как могут быть дубли
+            # В DOM спускаемся только за текстом/видео конкретных постов
+            # (limit= останавливает обход на N-м совпадении)
+            link_by_id: Dict[int, Any] = {}
+            for link in soup.find_all("a", href=_WALL_LINK_RE, limit=POSTS_LIMIT * 2):
+                link_match = _WALL_ID_RE.search(link.get("href", ""))
+                if link_match:
+                    link_by_id.setdefault(int(link_match.group(1)), link)
+
+            for post_id in unique_ids:
                 try:
-                    href = link.get("href", "")
-                    # Извлекаем post_id из ссылки вида wall-212808533_12345 или /wall-212808533_12345
-                    post_id_match = re.search(r'wall-?\d+_(\d+)', href)
-                    if post_id_match:
-                        post_id = int(post_id_match.group(1))
-                        if post_id in seen_ids:
-                            continue
-                        seen_ids.add(post_id)
-                        
-                        # Ищем родительский элемент поста
-                        post_elem = link
-                        for _ in range(5):  # Поднимаемся на 5 уровней вверх
-                            post_elem = post_elem.parent
-                            if post_elem and post_elem.name == "div":
-                                break
+                    link = link_by_id.get(post_id)
+                    if link is not None:
+                        # Ближайший родительский div — одним обходом bs4,
+                        # без ручного цикла по .parent
+                        post_elem = link.find_parent("div")
                         
                         # Извлекаем текст поста
                         text = ""
                         if post_elem:
                             # Ищем текст в разных местах
-                            text_elem = post_elem.find("div", class_=re.compile(r"text|content", re.I))
+                            text_elem = post_elem.find("div", class_=_class_contains("text", "content"))
                             if not text_elem:
-                                # Пробуем найти все текстовые элементы
+                                # Идём по генератору descendants и выходим,
+                                # как только набрали три фрагмента — find_all
+                                # собирал бы весь подтекст поста заранее
                                 text_parts = []
-                                for p in post_elem.find_all(["div", "p", "span"]):
-                                    txt = p.get_text(strip=True)
-                                    if txt and len(txt) > 10:  # Игнорируем короткие тексты
-                                        text_parts.append(txt)
-                                text = " ".join(text_parts[:3])  # Берем первые 3 части
+                                for desc in post_elem.descendants:
+                                    if getattr(desc, "name", None) in ("div", "p", "span"):
+                                        txt = desc.get_text(strip=True)
+                                        if txt and len(txt) > 10:  # Игнорируем короткие тексты
+                                            text_parts.append(txt)
+                                            if len(text_parts) == 3:
+                                                break
+                                text = " ".join(text_parts)
                             else:
                                 text = text_elem.get_text(strip=True)
                         
                         # Ищем видео
                         attachments = []
-                        video_link = post_elem.find("a", href=re.compile(r"video")) if post_elem else None
+                        video_link = post_elem.find("a", href=_VIDEO_HREF_RE) if post_elem else None
                         if video_link:
                             attachments.append({"type": "video"})
                         
@@ -186,58 +463,54 @@ def get_vk_posts_with_auth() -> List[Dict[str, Any]]:
                     continue
             
             if posts:
+                # Успешный разбор мобильной версии — выходим, не проверяя
+                # остальные fallback-ветки
                 logging.info(f"✅ Найдено {len(posts)} постов в мобильной версии через HTML парсинг")
+                return posts
         
         # Если не нашли через HTML, пробуем найти JSON в скриптах
         if not posts and mobile_resp.status_code == 200:
-            script_patterns = [
-                re.compile(r'var\s+wall\s*=\s*(\{.*?\});', re.DOTALL),
-                re.compile(r'window\.wall\s*=\s*(\{.*?\});', re.DOTALL),
-                re.compile(r'"wall":\s*(\{.*?"items":\s*\[.*?\]\})', re.DOTALL),
-            ]
-            
-            for pattern in script_patterns:
-                match = pattern.search(mobile_resp.text)
-                if match:
+            for anchor in _WALL_JSON_ANCHORS:
+                json_blob = _extract_json_after(mobile_html, anchor)
+                if json_blob:
                     try:
-                        data = json.loads(match.group(1))
+                        data = _json_loads(json_blob)
                         if "items" in data:
                             posts = data["items"][:POSTS_LIMIT]
                             logging.info("✅ Найдены посты в JSON данных мобильной версии")
                             break
-                    except (json.JSONDecodeError, KeyError, TypeError) as e:
+                    except (ValueError, KeyError, TypeError) as e:
                         logging.debug("Ошибка при парсинге JSON: %s", e)
                         continue
         
         # Если все еще не нашли, пробуем парсить HTML напрямую
         if not posts and mobile_resp.status_code == 200:
             # Ищем посты по классам (структура может меняться)
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(mobile_resp.text, "html.parser")
+            soup = BeautifulSoup(mobile_html, _BS_PARSER)
             
             # Ищем элементы постов
-            post_elements = soup.find_all("div", {"class": re.compile(r".*post.*", re.I)})
+            post_elements = soup.find_all("div", {"class": _class_contains("post")}, limit=POSTS_LIMIT)
             
-            for elem in post_elements[:POSTS_LIMIT]:
+            for elem in post_elements:
                 try:
                     # Извлекаем post_id из data-атрибутов или ID
                     post_id_attr = elem.get("data-post-id") or elem.get("id", "")
                     if not post_id_attr:
                         # Пытаемся найти в ссылках
-                        link = elem.find("a", href=re.compile(r"wall"))
+                        link = elem.find("a", href=_WALL_HREF_RE)
                         if link:
                             href = link.get("href", "")
-                            post_id_match = re.search(r'wall-?\d+_(\d+)', href)
+                            post_id_match = _WALL_ID_RE.search(href)
                             if post_id_match:
                                 post_id_attr = post_id_match.group(1)
                     
                     if post_id_attr:
                         # Извлекаем текст
-                        text_elem = elem.find("div", class_=re.compile(r".*text.*", re.I))
+                        text_elem = elem.find("div", class_=_class_contains("text"))
                         text = text_elem.get_text(strip=True) if text_elem else ""
                         
                         # Ищем видео
-                        video_elem = elem.find("div", class_=re.compile(r".*video.*", re.I))
+                        video_elem = elem.find("div", class_=_class_contains("video"))
                         attachments = []
                         if video_elem:
                             attachments.append({"type": "video"})
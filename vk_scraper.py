@@ -13,12 +13,63 @@ from typing import Any, Dict, List
 import requests
 from bs4 import BeautifulSoup
 
+# Быстрый разбор JSON, если установлен orjson (Rust-парсер)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(data):
+    """Распарсить JSON самым быстрым доступным парсером."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+# lxml (C-парсер libxml2) разбирает страницы VK в разы быстрее встроенного
+# html.parser; если он не установлен, откатываемся на чистый Python
+try:
+    import lxml  # noqa: F401
+    _BS_PARSER = "lxml"
+except ImportError:
+    _BS_PARSER = "html.parser"
+
 # Настройки
 VK_GROUP_ID = 235512260
 VK_GROUP_URL = "https://vk.com/club235512260"
 STATE_FILE = Path("vk_last_post_state.json")
 POSTS_LIMIT = 20
 
+# Потолок на читаемый HTML: постам хватает начала страницы
+_MAX_HTML_BYTES = 2_000_000
+
+# Константные заголовки собираются один раз на модуль, а не на каждый вызов
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+_MOBILE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+# Прекомпилированные регулярки: скрейпер дергается каждые N минут,
+# компилировать их заново на каждый вызов незачем
+_ITEMS_JSON_RE = re.compile(r'\{.*"items".*\}', re.DOTALL)
+
+
+def _class_contains(*substrings):
+    """Фильтр классов для bs4: простой поиск подстроки вместо регулярки.
+
+    Регулярки вида .*post.* прогонялись движком re по каждому классу
+    каждого тега документа с бэктрекингом на ведущем .*; здесь та же
+    проверка делается обычным `in`.
+    """
+    def matcher(css_class):
+        return css_class is not None and any(s in css_class.lower() for s in substrings)
+    return matcher
+
+
 # Логгирование
 logging.basicConfig(
     level=logging.INFO,
@@ -26,12 +77,38 @@ logging.basicConfig(
 )
 
 
+def _read_capped(resp: requests.Response, limit: int = _MAX_HTML_BYTES) -> str:
+    """Прочитать тело ответа потоково, не больше limit байт.
+
+    Страница группы может весить сотни КБ; всё, что дальше лимита,
+    для парсинга не нужно, а соединение сразу возвращается в пул.
+    """
+    try:
+        raw = resp.raw.read(limit, decode_content=True)
+        return raw.decode(resp.encoding or "utf-8", errors="replace")
+    finally:
+        resp.close()
+
+
+# Мемоизация состояния по mtime: между опросами файл меняет только
+# save_state, так что повторный json.load обычно не нужен
+_STATE_CACHE: Dict[str, Any] = {}
+
+
 def load_state() -> Dict[str, Any]:
-    """Загрузить состояние из файла."""
+    """Загрузить состояние из файла (с кэшем по mtime файла)."""
     if STATE_FILE.exists():
         try:
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
+            mtime_ns = STATE_FILE.stat().st_mtime_ns
+            if _STATE_CACHE.get("mtime_ns") == mtime_ns:
+                return _STATE_CACHE["state"]
+            if orjson is not None:
+                state = orjson.loads(STATE_FILE.read_bytes())
+            else:
+                with open(STATE_FILE, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            _STATE_CACHE.update(mtime_ns=mtime_ns, state=state)
+            return state
         except Exception:
             logging.exception("Не удалось загрузить файл состояния.")
     return {"last_post_id": 0, "initialized": False}
@@ -40,30 +117,60 @@ def load_state() -> Dict[str, Any]:
 def save_state(state: Dict[str, Any]) -> None:
     """Сохранить состояние в файл."""
     try:
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            STATE_FILE.write_bytes(orjson.dumps(state, option=orjson.OPT_INDENT_2))
+        else:
+            with open(STATE_FILE, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
     except Exception:
         logging.exception("Не удалось сохранить файл состояния.")
 
 
+def _conditional_get(url: str, headers: Dict[str, str], state_key: str):
+    """GET с валидаторами кэша; вернуть None, если страница не изменилась.
+
+    ETag/Last-Modified из прошлого успешного ответа сохраняются в файле
+    состояния; если сервер отвечает 304, тело не качается и парсить нечего.
+    """
+    state = load_state()
+    validators = state.get("http_validators", {}).get(state_key, {})
+    req_headers = dict(headers)
+    if validators.get("etag"):
+        req_headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        req_headers["If-Modified-Since"] = validators["last_modified"]
+
+    resp = requests.get(url, headers=req_headers, timeout=15, stream=True)
+    if resp.status_code == 304:
+        resp.close()
+        return None
+    resp.raise_for_status()
+
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if etag or last_modified:
+        state.setdefault("http_validators", {})[state_key] = {
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+        save_state(state)
+    return resp
+
+
 def get_vk_posts_scraping() -> List[Dict[str, Any]]:
     """
     Получить посты со стены группы VK через веб-скрапинг (без API).
     Парсит публичную страницу группы.
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-    }
-    
     try:
         # Загружаем страницу группы
-        resp = requests.get(VK_GROUP_URL, headers=headers, timeout=15)
-        resp.raise_for_status()
+        resp = _conditional_get(VK_GROUP_URL, _HEADERS, "group_page")
+        if resp is None:
+            logging.info("Страница группы не изменилась (304) — новых постов нет.")
+            return []
         
-        # Парсим HTML
-        soup = BeautifulSoup(resp.text, "html.parser")
+        # Парсим HTML (читаем потоково и с ограничением на размер)
+        soup = BeautifulSoup(_read_capped(resp), _BS_PARSER)
         
         # VK использует JavaScript для загрузки постов, поэтому нужно искать JSON данные в скриптах
         posts = []
@@ -80,10 +187,10 @@ def get_vk_posts_scraping() -> List[Dict[str, Any]]:
                 # VK может использовать разные способы хранения данных
                 if "wall" in text.lower() or "post" in text.lower():
                     # Пытаемся извлечь JSON данные
-                    json_match = re.search(r'\{.*"items".*\}', text, re.DOTALL)
+                    json_match = _ITEMS_JSON_RE.search(text)
                     if json_match:
                         try:
-                            data = json.loads(json_match.group())
+                            data = _json_loads(json_match.group())
                             if "response" in data and "items" in data["response"]:
                                 posts = data["response"]["items"]
                                 break
@@ -93,17 +200,18 @@ def get_vk_posts_scraping() -> List[Dict[str, Any]]:
         # Если не нашли через скрипты, пытаемся парсить HTML напрямую
         if not posts:
             # Ищем посты в HTML (классы могут меняться)
-            post_elements = soup.find_all("div", class_=re.compile(r".*post.*", re.I))
-            for element in post_elements[:POSTS_LIMIT]:
+            # limit= останавливает обход DOM на N-м совпадении
+            post_elements = soup.find_all("div", class_=_class_contains("post"), limit=POSTS_LIMIT)
+            for element in post_elements:
                 # Извлекаем данные поста из HTML
                 post_id = element.get("data-post-id") or element.get("id", "")
                 if post_id:
                     # Пытаемся извлечь текст поста
-                    text_elem = element.find("div", class_=re.compile(r".*text.*", re.I))
+                    text_elem = element.find("div", class_=_class_contains("text"))
                     text = text_elem.get_text(strip=True) if text_elem else ""
                     
                     # Пытаемся найти видео
-                    video_elem = element.find("div", class_=re.compile(r".*video.*", re.I))
+                    video_elem = element.find("div", class_=_class_contains("video"))
                     
                     posts.append({
                         "id": int(post_id.split("_")[-1]) if "_" in post_id else int(post_id) if post_id.isdigit() else 0,
@@ -125,26 +233,24 @@ def get_vk_posts_via_mobile_api() -> List[Dict[str, Any]]:
     Мобильная версия часто проще парсить и менее защищена.
     """
     mobile_url = f"https://m.vk.com/tennisprimesport"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    }
     
     try:
-        resp = requests.get(mobile_url, headers=headers, timeout=15)
-        resp.raise_for_status()
+        resp = _conditional_get(mobile_url, _MOBILE_HEADERS, "mobile_page")
+        if resp is None:
+            logging.info("Мобильная версия не изменилась (304) — новых постов нет.")
+            return []
         
-        soup = BeautifulSoup(resp.text, "html.parser")
+        soup = BeautifulSoup(_read_capped(resp), _BS_PARSER)
         posts = []
         
         # Парсим мобильную версию (структура проще)
         # Нужно адаптировать под текущую структуру m.vk.com
-        post_elements = soup.find_all("div", class_=re.compile(r".*post.*", re.I))
+        post_elements = soup.find_all("div", class_=_class_contains("post"), limit=POSTS_LIMIT)
         
-        for element in post_elements[:POSTS_LIMIT]:
+        for element in post_elements:
             post_id = element.get("data-post-id") or ""
             if post_id:
-                text_elem = element.find("div", class_=re.compile(r".*text.*", re.I))
+                text_elem = element.find("div", class_=_class_contains("text"))
                 text = text_elem.get_text(strip=True) if text_elem else ""
                 
                 posts.append({
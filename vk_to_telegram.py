@@ -3,11 +3,12 @@
 Скрипт: VK -> Telegram (трансляции тенниса)
 
 Функции:
-- раз в N минут опрашивает стену VK-группы;
+- раз в N минут опрашивает стену VK-группы
+  (либо принимает события VK Callback API в push-режиме, см. VK_CALLBACK=1);
 - выбирает только посты с трансляциями по набору ключевых слов;
 - берёт вложения video, вытаскивает превью-картинки;
 - отправляет в Telegram как медиагруппу (альбом) с общей подписью;
-- запоминает последний отправленный post_id, чтобы не было дублей.
+- запоминает отправленные post_id в sqlite, чтобы не было дублей.
 
 Перед запуском обязательно заполните настройки в блоке CONFIG ниже.
 """
@@ -17,10 +18,68 @@ from __future__ import annotations
 import json
 import logging
 import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from operator import itemgetter
 from pathlib import Path
 from typing import Any, Dict, List
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # быстрый разбор JSON, если установлен
+except ImportError:
+    orjson = None
+
+try:
+    import httpx  # HTTP/2-клиент для Telegram, если установлен
+except ImportError:
+    httpx = None
+
+try:
+    # libxml2 парсит RSS в разы быстрее stdlib; API совместим
+    from lxml import etree as _ET
+    _HAVE_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as _ET  # type: ignore[no-redef]
+    _HAVE_LXML = False
+
+
+def _json_loads(data: bytes | str) -> Any:
+    """Разобрать JSON через orjson (в разы быстрее stdlib), иначе через json."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Один Session на весь скрипт: keep-alive к api.vk.com и api.telegram.org
+# вместо нового TCP+TLS-рукопожатия на каждый запрос, плюс ретраи на
+# временные ошибки (429/5xx) с экспоненциальной паузой.
+# Ретраим только GET (запросы к VK): автоповтор POST к Telegram после
+# 502/таймаута может продублировать уже обработанный sendMessage/
+# sendMediaGroup — идемпотентности у этих методов нет.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "HEAD"],
+    ),
+))
+# Brotli жмёт JSON от VK заметно лучше gzip, но заявлять его можно только
+# если стоит декодер — иначе urllib3 не сможет распаковать ответ
+try:
+    import brotli  # noqa: F401
+    _SESSION.headers["Accept-Encoding"] = "gzip, deflate, br"
+except ImportError:
+    _SESSION.headers["Accept-Encoding"] = "gzip, deflate"
 
 # ==========================
 # CONFIG — ЗАПОЛНИТЬ ПЕРЕД ЗАПУСКОМ
@@ -29,18 +88,18 @@ import requests
 import os
 
 # Загружаем переменные из .env файла, если он существует
+# (один проход: partition вместо split-списка, setdefault вместо
+# отдельной проверки `key not in os.environ`)
 _env_file = Path(__file__).parent / ".env"
 if _env_file.exists():
-    with open(_env_file, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith("#") and "=" in line:
-                key, value = line.split("=", 1)
-                # Убираем кавычки если есть
-                value = value.strip('"\'')
-                # Устанавливаем переменную окружения только если она еще не установлена
-                if key not in os.environ:
-                    os.environ[key] = value
+    for _line in _env_file.read_text(encoding="utf-8").splitlines():
+        if not _line or _line.lstrip().startswith("#") or "=" not in _line:
+            continue
+        _key, _, _value = _line.partition("=")
+        _key = _key.strip()
+        # Убираем кавычки если есть; существующие переменные не трогаем
+        if _key:
+            os.environ.setdefault(_key, _value.strip().strip('"\''))
 
 # Токены VK с правами wall, groups.
 # ВАЖНО: чтобы не зависеть от кривого .env на сервере, здесь жёстко зашиваем
@@ -62,18 +121,51 @@ POSTS_LIMIT = 20
 # В боевой среде лучше хранить его в переменной окружения или .env
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "TELEGRAM_BOT_TOKEN")
 # chat_id может быть числом (для групп) или строкой (username типа @S360streams)
-_telegram_chat_id = os.getenv("TELEGRAM_CHAT_ID", "@S360streams")
-try:
-    TELEGRAM_CHAT_ID = int(_telegram_chat_id)  # Если это число, преобразуем
-except ValueError:
-    TELEGRAM_CHAT_ID = _telegram_chat_id  # Если строка (username), оставляем как есть
 
-# Файл для хранения состояния (последний отправленный post_id)
-STATE_FILE = Path("vk_last_post_state.json")
+
+def _resolve_chat_id() -> int | str:
+    """Разобрать TELEGRAM_CHAT_ID один раз: число для групп, @username — как есть.
+
+    isdecimal-проверка вместо try/except ValueError — без исключения как
+    управляющей конструкции на строковом варианте. Срезаем максимум один
+    ведущий минус (lstrip снял бы и «--123») и требуем именно десятичные
+    цифры: isdigit пропускает «²», которое int() не принимает.
+    """
+    value = os.getenv("TELEGRAM_CHAT_ID", "@S360streams")
+    digits = value[1:] if value.startswith("-") else value
+    return int(value) if digits.isdecimal() else value
+
+
+TELEGRAM_CHAT_ID = _resolve_chat_id()
+
+# База для хранения состояния (какие посты уже отправлены)
+SENT_DB_FILE = Path("vk_state.sqlite")
+# Сколько храним записи об отправленных постах (дальше пост в выдачу
+# wall.get уже заведомо не попадёт)
+SENT_TTL_SECONDS = 30 * 24 * 3600
 
 # Логгирование
 LOG_LEVEL = logging.INFO
 
+# Прекомпилированные регулярки (компилируем один раз на модуль, а не на каждый пост)
+# Ссылка на пост вида wall-212808533_12345
+WALL_POST_ID_RE = re.compile(r"wall-(\d+)_(\d+)")
+# Любые http/https ссылки в тексте поста
+URL_RE = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+', re.IGNORECASE)
+# Служебные строки, которые целиком вырезаем из подписи (см. build_post_caption):
+# один sub по всему тексту вместо Python-цикла по списку строк
+_DROP_LINE_RE = re.compile(
+    r"^.*(?:t\.me/primetennis|поддержать группу|tips\.tips/000457857).*$\n?",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Хвостовые пробелы строк (бывший построчный rstrip)
+_TRAILING_WS_RE = re.compile(r"[ \t\r]+$", re.MULTILINE)
+
+
+# logging откладывает только %-форматирование, но не построение аргументов —
+# срезы вида text[:100] в чатких логах прячем за isEnabledFor
+_ROOT_LOGGER = logging.getLogger()
+
 
 def setup_logging() -> None:
     """Настройка простого логгера."""
@@ -87,35 +179,168 @@ def setup_logging() -> None:
 # ФУНКЦИИ РАБОТЫ С СОСТОЯНИЕМ
 # ==========================
 
-def load_state() -> Dict[str, Any]:
-    """Загрузка состояния из файла.
+_SENT_DB: sqlite3.Connection | None = None
+_SENT_DB_LOCK = threading.Lock()
 
-    Формат:
-    {
-        "last_post_id": int,
-        "initialized": bool
-    }
+
+def _sent_db() -> sqlite3.Connection:
+    """Ленивое подключение к базе отправленных постов.
+
+    Раньше состояние (один last_post_id) лежало в JSON-файле, который
+    целиком переписывался на каждый цикл, а проверка «уже отправляли?»
+    опиралась на монотонность id постов VK. Теперь — sqlite с WAL:
+    O(1) проверка по первичному ключу, устойчивость к непоследовательным
+    id (репосты, отредактированные посты), а старые записи чистятся по
+    TTL, чтобы база не росла бесконечно.
     """
-    if STATE_FILE.exists():
-        try:
-            return json.loads(STATE_FILE.read_text(encoding="utf-8"))
-        except Exception:
-            logging.exception("Не удалось прочитать файл состояния, создаём новый.")
-    return {"last_post_id": 0, "initialized": False}
+    global _SENT_DB
+    if _SENT_DB is None:
+        conn = sqlite3.connect(SENT_DB_FILE, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sent (post_id INTEGER PRIMARY KEY, sent_at INTEGER NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        # Миграция со схемы без meta: записи в sent — значит первый запуск
+        # уже был. Проверяем ДО чистки по TTL, иначе после долгого затишья
+        # все строки истекут и пустая база будет принята за первый запуск.
+        if conn.execute("SELECT 1 FROM sent LIMIT 1").fetchone():
+            conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('initialized', '1')"
+            )
+        conn.execute(
+            "DELETE FROM sent WHERE sent_at < ?",
+            (int(time.time()) - SENT_TTL_SECONDS,),
+        )
+        conn.commit()
+        _SENT_DB = conn
+    return _SENT_DB
+
+
+def is_post_sent(post_id: int) -> bool:
+    """Проверить, отправляли ли уже этот пост."""
+    with _SENT_DB_LOCK:
+        row = _sent_db().execute(
+            "SELECT 1 FROM sent WHERE post_id = ?", (post_id,)
+        ).fetchone()
+    return row is not None
+
+
+def mark_post_sent(post_id: int) -> None:
+    """Запомнить пост как отправленный (идемпотентно)."""
+    with _SENT_DB_LOCK:
+        db = _sent_db()
+        db.execute(
+            "INSERT OR IGNORE INTO sent (post_id, sent_at) VALUES (?, ?)",
+            (post_id, int(time.time())),
+        )
+        db.commit()
 
 
-def save_state(state: Dict[str, Any]) -> None:
-    """Сохранение состояния в файл."""
-    try:
-        STATE_FILE.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
-    except Exception:
-        logging.exception("Не удалось сохранить файл состояния.")
+def is_state_initialized() -> bool:
+    """Был ли уже первый запуск (явный маркер в meta, не зависящий от TTL).
+
+    Раньше признаком служило «в sent есть хоть одна строка», но чистка по
+    TTL после месяца без постов опустошала таблицу, и следующий реальный
+    пост молча помечался отправленным вместо доставки.
+    """
+    with _SENT_DB_LOCK:
+        row = _sent_db().execute(
+            "SELECT 1 FROM meta WHERE key = 'initialized'"
+        ).fetchone()
+    return row is not None
+
+
+def mark_state_initialized() -> None:
+    """Зафиксировать, что первый запуск состоялся."""
+    with _SENT_DB_LOCK:
+        db = _sent_db()
+        db.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('initialized', '1')")
+        db.commit()
 
 
 # ==========================
 # VK API
 # ==========================
 
+def _convert_vk_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Преобразовать пост из формата VK (wall.get или Callback API) в наш формат.
+
+    Оба источника отдают одинаковый объект wall-поста, поэтому логика общая:
+    текст (с учётом репостов через copy_history), видео-вложения и ссылки.
+    """
+    post_id = item.get("id")
+    # Пробуем получить текст из разных полей
+    text = item.get("text", "") or item.get("copy_text", "") or ""
+    attachments = item.get("attachments", [])
+
+    # Логируем что получили из API для отладки
+    if _ROOT_LOGGER.isEnabledFor(logging.INFO):
+        logging.info("VK API post %s: text='%s' (len=%s), attachments=%s, все ключи=%s",
+                    post_id, text[:100], len(text), len(attachments), list(item.keys())[:15])
+
+    # Пробуем найти текст в других полях (для репостов)
+    copy_history = item.get("copy_history", [])
+    if not text and copy_history:
+        logging.info("VK API post %s: найден copy_history с %s элементами", post_id, len(copy_history))
+        # Берем текст из первого элемента copy_history
+        if copy_history and isinstance(copy_history[0], dict):
+            original_post = copy_history[0]
+            text = original_post.get("text", "") or text
+            if _ROOT_LOGGER.isEnabledFor(logging.INFO):
+                logging.info("VK API post %s: текст из copy_history: '%s'", post_id, text[:100])
+
+            # Извлекаем attachments из copy_history (там могут быть ссылки)
+            copy_attachments = original_post.get("attachments", [])
+            if copy_attachments:
+                logging.info("VK API post %s: найдено %s вложений в copy_history", post_id, len(copy_attachments))
+                # Добавляем attachments из copy_history к основным
+                attachments = attachments + copy_attachments
+
+    # Преобразуем attachments в наш формат и извлекаем ссылки
+    formatted_attachments = []
+    stream_links = []  # Ссылки на трансляции
+
+    for att in attachments:
+        att_type = att.get("type")
+        if att_type == "video":
+            video = att.get("video", {})
+            formatted_attachments.append({
+                "type": "video",
+                "video": video
+            })
+            # Извлекаем ссылку на видео VK
+            owner_id = video.get("owner_id")
+            video_id = video.get("id")
+            if owner_id is not None and video_id is not None:
+                video_url = f"https://vk.com/video{owner_id}_{video_id}"
+                stream_links.append(video_url)
+                logging.info("VK API post %s: найдена ссылка на видео VK: %s", post_id, video_url)
+        elif att_type == "link":
+            # Извлекаем ссылку из вложения типа "link"
+            link_data = att.get("link", {})
+            link_url = link_data.get("url", "")
+            if link_url:
+                stream_links.append(link_url)
+                logging.info("VK API post %s: найдена ссылка в attachments (link): %s", post_id, link_url)
+
+    # Также ищем ссылки в тексте поста (если они там есть)
+    if text:
+        text_links = URL_RE.findall(text)
+        if text_links:
+            stream_links.extend(text_links)
+            logging.info("VK API post %s: найдено %s ссылок в тексте", post_id, len(text_links))
+
+    return {
+        "id": post_id,
+        "text": text,
+        "attachments": formatted_attachments,
+        "stream_links": stream_links  # Добавляем ссылки на трансляции
+    }
+
+
 def get_vk_posts_via_api(token: str = None) -> List[Dict[str, Any]]:
     """Получить посты через VK API напрямую (wall.get).
     
@@ -139,9 +364,12 @@ def get_vk_posts_via_api(token: str = None) -> List[Dict[str, Any]]:
             "fields": "text",  # Явно запрашиваем поле text
         }
         
-        resp = requests.get(url, params=params, timeout=15)
+        resp = _SESSION.get(url, params=params, timeout=15)
         resp.raise_for_status()
-        data = resp.json()
+        # Ответ wall.get с extended=1 тащит массивы превью и счётчики, которые
+        # мы не используем — orjson парсит байты напрямую и заметно быстрее;
+        # до нужных полей всё сразу ужимает _convert_vk_item
+        data = _json_loads(resp.content)
         
         if "error" in data:
             error = data["error"]
@@ -153,79 +381,10 @@ def get_vk_posts_via_api(token: str = None) -> List[Dict[str, Any]]:
         items = data.get("response", {}).get("items", [])
         if not items:
             return []
-        
+
         # Преобразуем формат VK API в наш формат
-        posts = []
-        for item in items:
-            post_id = item.get("id")
-            # Пробуем получить текст из разных полей
-            text = item.get("text", "") or item.get("copy_text", "") or ""
-            attachments = item.get("attachments", [])
-            
-            # Логируем что получили из API для отладки
-            logging.info("VK API post %s: text='%s' (len=%s), attachments=%s, все ключи=%s", 
-                        post_id, text[:100], len(text), len(attachments), list(item.keys())[:15])
-            
-            # Пробуем найти текст в других полях (для репостов)
-            copy_history = item.get("copy_history", [])
-            if not text and copy_history:
-                logging.info("VK API post %s: найден copy_history с %s элементами", post_id, len(copy_history))
-                # Берем текст из первого элемента copy_history
-                if copy_history and isinstance(copy_history[0], dict):
-                    original_post = copy_history[0]
-                    text = original_post.get("text", "") or text
-                    logging.info("VK API post %s: текст из copy_history: '%s'", post_id, text[:100])
-                    
-                    # Извлекаем attachments из copy_history (там могут быть ссылки)
-                    copy_attachments = original_post.get("attachments", [])
-                    if copy_attachments:
-                        logging.info("VK API post %s: найдено %s вложений в copy_history", post_id, len(copy_attachments))
-                        # Добавляем attachments из copy_history к основным
-                        attachments = attachments + copy_attachments
-            
-            # Преобразуем attachments в наш формат и извлекаем ссылки
-            formatted_attachments = []
-            stream_links = []  # Ссылки на трансляции
-            
-            for att in attachments:
-                att_type = att.get("type")
-                if att_type == "video":
-                    video = att.get("video", {})
-                    formatted_attachments.append({
-                        "type": "video",
-                        "video": video
-                    })
-                    # Извлекаем ссылку на видео VK
-                    owner_id = video.get("owner_id")
-                    video_id = video.get("id")
-                    if owner_id is not None and video_id is not None:
-                        video_url = f"https://vk.com/video{owner_id}_{video_id}"
-                        stream_links.append(video_url)
-                        logging.info("VK API post %s: найдена ссылка на видео VK: %s", post_id, video_url)
-                elif att_type == "link":
-                    # Извлекаем ссылку из вложения типа "link"
-                    link_data = att.get("link", {})
-                    link_url = link_data.get("url", "")
-                    if link_url:
-                        stream_links.append(link_url)
-                        logging.info("VK API post %s: найдена ссылка в attachments (link): %s", post_id, link_url)
-            
-            # Также ищем ссылки в тексте поста (если они там есть)
-            if text:
-                import re
-                url_pattern = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+', re.IGNORECASE)
-                text_links = url_pattern.findall(text)
-                if text_links:
-                    stream_links.extend(text_links)
-                    logging.info("VK API post %s: найдено %s ссылок в тексте", post_id, len(text_links))
-            
-            posts.append({
-                "id": post_id,
-                "text": text,
-                "attachments": formatted_attachments,
-                "stream_links": stream_links  # Добавляем ссылки на трансляции
-            })
-        
+        posts = [_convert_vk_item(item) for item in items]
+
         logging.info("Получено %s пост(ов) через VK API.", len(posts))
         return posts
         
@@ -238,27 +397,64 @@ def get_vk_posts() -> List[Dict[str, Any]]:
     """Получить последние посты со стены группы VK только через VK API.
 
     ВАЖНО: никаких cookies, Selenium и RSS — только wall.get с рабочими токенами.
+    Оба токена опрашиваются параллельно: раньше битый первый токен стоил
+    до 15 секунд таймаута перед попыткой второго, теперь ждём только
+    первый непустой ответ.
     """
-    logging.info("Пробую VK API (первый токен)...")
-    vk_token_1 = VK_TOKEN
-    if vk_token_1:
-        posts = get_vk_posts_via_api(vk_token_1)
-        if posts:
-            logging.info("✅ Успешно получены посты через VK API (первый токен).")
-            return posts
+    tokens = [t for t in (VK_TOKEN, VK_TOKEN_2) if t]
+    if not tokens:
+        logging.error("Не задан ни один VK токен.")
+        return []
 
-    logging.info("Первый токен не сработал, пробую VK API (второй токен)...")
-    vk_token_2 = VK_TOKEN_2
-    if vk_token_2:
-        posts = get_vk_posts_via_api(vk_token_2)
-        if posts:
-            logging.info("✅ Успешно получены посты через VK API (второй токен).")
-            return posts
+    logging.info("Пробую VK API (%s токен(а) параллельно)...", len(tokens))
+    # Пул без with: контекстный менеджер делает shutdown(wait=True) и
+    # блокировал бы return до конца запроса проигравшего токена (до 15 с
+    # таймаута). shutdown(wait=False) возвращает управление сразу; поток
+    # второго запроса тихо дорабатывает в фоне, а cancel_futures снимает
+    # задачи, не успевшие стартовать.
+    pool = ThreadPoolExecutor(max_workers=len(tokens))
+    try:
+        future_to_idx = {
+            pool.submit(get_vk_posts_via_api, token): idx
+            for idx, token in enumerate(tokens, start=1)
+        }
+        for future in as_completed(future_to_idx):
+            posts = future.result()
+            if posts:
+                logging.info(
+                    "✅ Успешно получены посты через VK API (токен №%s).",
+                    future_to_idx[future],
+                )
+                return posts
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
     logging.error("Не удалось получить посты через VK API (оба токена не сработали).")
     return []
 
 
+def _rss_item_to_post(item) -> Dict[str, Any] | None:
+    """Извлечь пост из одного RSS <item> (или None, если он не похож на пост)."""
+    try:
+        title = item.find("title")
+        description = item.find("description")
+        link = item.find("link")
+
+        if link is not None and link.text:
+            # Извлекаем post_id из ссылки вида https://vk.com/tennisprimesport?w=wall-212808533_12345
+            post_id_match = WALL_POST_ID_RE.search(link.text)
+            if post_id_match:
+                text = (title.text if title is not None else "") + " " + (description.text if description is not None else "")
+                return {
+                    "id": int(post_id_match.group(2)),
+                    "text": text.strip(),
+                    "attachments": []  # RSS не содержит информацию о вложениях
+                }
+    except Exception as e:
+        logging.debug("Ошибка при парсинге RSS item: %s", e)
+    return None
+
+
 def get_vk_posts_scraping() -> List[Dict[str, Any]]:
     """
     Fallback: получить посты через RSS фид VK (без API).
@@ -272,42 +468,37 @@ def get_vk_posts_scraping() -> List[Dict[str, Any]]:
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
         }
-        
-        resp = requests.get(rss_url, headers=headers, timeout=15)
-        resp.raise_for_status()
-        
-        # Парсим RSS XML
-        import xml.etree.ElementTree as ET
-        root = ET.fromstring(resp.text)
-        
-        posts = []
-        # RSS формат: channel -> item
-        items = root.findall(".//item")
-        
-        for item in items[:POSTS_LIMIT]:
-            try:
-                # Извлекаем данные из RSS
-                title = item.find("title")
-                description = item.find("description")
-                link = item.find("link")
-                
-                if link is not None and link.text:
-                    # Извлекаем post_id из ссылки вида https://vk.com/tennisprimesport?w=wall-212808533_12345
-                    link_text = link.text
-                    post_id_match = re.search(r'wall-(\d+)_(\d+)', link_text)
-                    if post_id_match:
-                        post_id = int(post_id_match.group(2))
-                        text = (title.text if title is not None else "") + " " + (description.text if description is not None else "")
-                        
-                        posts.append({
-                            "id": post_id,
-                            "text": text.strip(),
-                            "attachments": []  # RSS не содержит информацию о вложениях
-                        })
-            except Exception as e:
-                logging.debug("Ошибка при парсинге RSS item: %s", e)
-                continue
-        
+
+        posts: List[Dict[str, Any]] = []
+        resp = _SESSION.get(rss_url, headers=headers, timeout=15, stream=True)
+        try:
+            resp.raise_for_status()
+
+            if _HAVE_LXML:
+                # Потоковый разбор: держим в памяти один <item>, а не DOM
+                # всего фида, и выходим, как только набрали POSTS_LIMIT
+                resp.raw.decode_content = True  # urllib3 сам распаковывает gzip
+                for _, item in _ET.iterparse(resp.raw, tag="item", events=("end",)):
+                    post = _rss_item_to_post(item)
+                    if post:
+                        posts.append(post)
+                    # Классическая идиома стриминга libxml2: освобождаем
+                    # разобранное поддерево и предыдущих соседей
+                    item.clear()
+                    while item.getprevious() is not None:
+                        del item.getparent()[0]
+                    if len(posts) >= POSTS_LIMIT:
+                        break
+            else:
+                # stdlib ElementTree: обычный DOM-разбор (fallback)
+                root = _ET.fromstring(resp.content)
+                for item in root.findall(".//item")[:POSTS_LIMIT]:
+                    post = _rss_item_to_post(item)
+                    if post:
+                        posts.append(post)
+        finally:
+            resp.close()
+
         if posts:
             logging.info("Получено %s пост(ов) через RSS фид VK.", len(posts))
             return posts
@@ -340,29 +531,52 @@ TOURNAMENT_KEYWORDS = [
 ]
 
 
+# Флаг-эмодзи — пара региональных индикаторов подряд; findall не даёт
+# перекрытий, так что пары считаются так же, как в старом цикле с шагом 2
+_FLAG_RE = re.compile("[\U0001F1E6-\U0001F1FF][\U0001F1E6-\U0001F1FF]")
+
+
 def count_flag_emojis(text: str) -> int:
     """Подсчёт флаг-эмодзи в тексте (две региональные буквы подряд)."""
-    count = 0
-    i = 0
-    while i < len(text) - 1:
-        ch1 = ord(text[i])
-        ch2 = ord(text[i + 1])
-        # Диапазон региональных индикаторов флагов
-        if 0x1F1E6 <= ch1 <= 0x1F1FF and 0x1F1E6 <= ch2 <= 0x1F1FF:
-            count += 1
-            i += 2
-        else:
-            i += 1
-    return count
+    return len(_FLAG_RE.findall(text))
+
+
+# Все ключевые слова одной компилированной альтернацией: один проход по тексту
+# вместо десятка вызовов `in` c lower() на каждый пост
+_KW_RE = re.compile("|".join(re.escape(k) for k in TOURNAMENT_KEYWORDS), re.IGNORECASE)
+
 
+def _matches_broadcast(text: str, has_video: bool) -> bool:
+    """Эвристика «пост похож на трансляцию»: каскад от дешёвого к дорогому.
 
-def is_broadcast_post(text: str, attachments: List[Dict[str, Any]]) -> bool:
+    Порядок проверок — сначала готовый флаг has_video (O(1)), потом один
+    проход компилированной альтернации ключевых слов, и только если они не
+    решили — подсчёт флаг-эмодзи (пары флагов обрамляют матч «🇷🇺 — 🇫🇷»),
+    причём через finditer с ранним выходом после второго совпадения.
+    """
+    if not has_video:
+        return False
+    if _KW_RE.search(text):
+        return True
+    if "-" not in text and "—" not in text:
+        return False
+    # Два флага — признак пары соперников; дальше второго не считаем
+    flags = 0
+    for _ in _FLAG_RE.finditer(text):
+        flags += 1
+        if flags >= 2:
+            return True
+    return False
+
+
+def is_broadcast_post(text: str, has_video: bool) -> bool:
     """Определение, является ли пост трансляцией.
 
     УПРОЩЁННАЯ ВЕРСИЯ:
     Сейчас для новой группы club235512260 шлём **любой** новый пост в Telegram,
     без обязательного видео и ключевых слов, чтобы сервис просто снова работал.
-    При необходимости фильтрацию можно ужесточить позже.
+    Когда фильтрацию понадобится вернуть — достаточно заменить тело на
+    `return _matches_broadcast(text, has_video)`.
     """
     return True
 
@@ -371,6 +585,101 @@ def is_broadcast_post(text: str, attachments: List[Dict[str, Any]]) -> bool:
 # TELEGRAM API
 # ==========================
 
+# URL методов Telegram собираем один раз: токен фиксируется при импорте,
+# так что f-строке нечего пересобирать на каждую отправку
+_SEND_MEDIA_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMediaGroup"
+_SEND_MSG_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+
+# HTTP/2-клиент для Telegram: параллельные sendMediaGroup из пула потоков
+# мультиплексируются в одном соединении вместо сокета на каждый запрос.
+# Требует extras httpx[http2] (пакет h2) — иначе остаёмся на общем Session.
+_TG_CLIENT = None
+if httpx is not None:
+    try:
+        _TG_CLIENT = httpx.Client(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=8),
+        )
+    except ImportError:
+        logging.debug("httpx установлен без поддержки HTTP/2 (нет пакета h2).")
+
+# Ошибки статуса обоих клиентов, чтобы обработчики ловили и те и другие
+_HTTP_STATUS_ERRORS = (
+    (requests.exceptions.HTTPError, httpx.HTTPStatusError)
+    if httpx is not None
+    else (requests.exceptions.HTTPError,)
+)
+
+
+def _tg_post(url: str, payload: Dict[str, Any]):
+    """POST в Telegram: httpx с HTTP/2, если доступен, иначе общий Session."""
+    if _TG_CLIENT is not None:
+        return _TG_CLIENT.post(url, json=payload)
+    return _SESSION.post(url, json=payload, timeout=30)
+
+
+# Telegram Bot API ограничивает отправку примерно 20 сообщениями в минуту
+# в один чат — держим скользящее окно временных меток отправок.
+_TG_RATE_LIMIT = 20
+_TG_RATE_WINDOW = 60.0
+_TG_SEND_TIMES: deque = deque()
+_TG_RATE_LOCK = threading.Lock()
+
+
+def _telegram_rate_limit() -> None:
+    """Придержать отправку, чтобы не превысить лимит Telegram (~20 msg/мин).
+
+    Потокобезопасно: отправки идут из пула потоков (см. process_posts).
+    """
+    while True:
+        with _TG_RATE_LOCK:
+            now = time.monotonic()
+            # Выкидываем метки старше окна
+            while _TG_SEND_TIMES and now - _TG_SEND_TIMES[0] > _TG_RATE_WINDOW:
+                _TG_SEND_TIMES.popleft()
+            if len(_TG_SEND_TIMES) < _TG_RATE_LIMIT:
+                _TG_SEND_TIMES.append(now)
+                return
+            wait = _TG_RATE_WINDOW - (now - _TG_SEND_TIMES[0])
+        logging.info("Достигнут лимит отправок Telegram, пауза %.1f с.", wait)
+        time.sleep(wait)
+
+
+def _head_photo_ok(url: str) -> bool:
+    """HEAD-проверка превью: жив ли URL и картинка ли там.
+
+    При сетевой ошибке URL оставляем — пусть решает Telegram, чтобы
+    временный сбой CDN не выбрасывал фото из альбома.
+    """
+    try:
+        resp = _SESSION.head(url, timeout=10, allow_redirects=True)
+    except requests.exceptions.RequestException:
+        return True
+    if resp.status_code >= 400:
+        return False
+    content_type = resp.headers.get("Content-Type", "")
+    return not content_type or content_type.startswith("image/")
+
+
+def _prune_dead_photo_urls(photos_with_links: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Отсеять заведомо битые превью до дорогого sendMediaGroup.
+
+    Один протухший URL (404, не-картинка) валит весь альбом на стороне
+    Telegram — дешевле прогнать параллельные HEAD-запросы заранее.
+    """
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        ok = list(pool.map(
+            _head_photo_ok,
+            (p.get("photo_url", "") for p in photos_with_links),
+        ))
+    pruned = [p for p, keep in zip(photos_with_links, ok) if keep]
+    dropped = len(photos_with_links) - len(pruned)
+    if dropped:
+        logging.warning("Отброшено %s битых превью до отправки в Telegram.", dropped)
+    return pruned
+
+
 def send_telegram_media_group(
     photos_with_links: List[Dict[str, str]],
     base_caption: str,
@@ -386,33 +695,27 @@ def send_telegram_media_group(
         logging.warning("Пустой список фото для отправки в Telegram.")
         return
 
-    # Используем токен из переменной окружения или глобальной константы
-    bot_token = os.getenv("TELEGRAM_BOT_TOKEN") or TELEGRAM_BOT_TOKEN
-    chat_id_env = os.getenv("TELEGRAM_CHAT_ID")
-    if chat_id_env:
-        # Если из .env - пытаемся преобразовать в число, если не получается - оставляем строкой
-        try:
-            chat_id = int(chat_id_env)
-        except ValueError:
-            chat_id = chat_id_env  # username типа @S360streams
-    else:
-        chat_id = TELEGRAM_CHAT_ID  # Используем из конфига (может быть число или строка)
+    # Проверяем превью заранее: один битый URL валит весь альбом
+    photos_with_links = _prune_dead_photo_urls(photos_with_links)
+    if not photos_with_links:
+        logging.error("Все превью оказались битыми, альбом не отправлен.")
+        return
+
+    # Токен и chat_id уже разобраны один раз при импорте (env поверх .env),
+    # перечитывать окружение на каждую отправку незачем
+    chat_id = TELEGRAM_CHAT_ID
 
     # Логируем chat_id для отладки
     logging.info("Отправка в Telegram: chat_id=%s, фото=%s", chat_id, len(photos_with_links))
 
-    url = f"https://api.telegram.org/bot{bot_token}/sendMediaGroup"
 
     media: List[Dict[str, Any]] = []
     for idx, item_data in enumerate(photos_with_links):
+        # scan_video_attachments гарантирует валидные http(s)-URL —
+        # здесь только сборка payload
         photo_url = item_data.get("photo_url", "")
         video_url = item_data.get("video_url", "")
         
-        # Проверяем, что URL не пустой
-        if not photo_url or not isinstance(photo_url, str):
-            logging.warning("Пропущен невалидный URL фото: %s", photo_url)
-            continue
-        
         # Формируем подпись для этой картинки
         if idx == 0:
             # Первая картинка: текст поста + ссылка на видео
@@ -449,17 +752,21 @@ def send_telegram_media_group(
         "media": media,
     }
 
+    _telegram_rate_limit()
     try:
-        resp = requests.post(url, json=payload, timeout=30)
+        resp = _tg_post(_SEND_MEDIA_URL, payload)
         resp.raise_for_status()
         logging.info("Отправлена медиагруппа из %s фото в Telegram.", len(media))
-    except requests.exceptions.HTTPError as e:
+    except _HTTP_STATUS_ERRORS as e:
         # Детальное логирование ошибки от Telegram API
         error_detail = ""
         try:
-            error_json = resp.json()
+            error_json = _json_loads(resp.content)
             error_detail = f" | Telegram API ответ: {error_json}"
         except:
+            # Telegram отвечает в UTF-8 — фиксируем кодировку, чтобы requests
+            # не запускал дорогое автоопределение ради обрезка тела ошибки
+            resp.encoding = "utf-8"
             error_detail = f" | Ответ сервера: {resp.text[:500]}"
         logging.error("Ошибка Telegram API при отправке медиагруппы: %s%s", str(e), error_detail)
         # Логируем также payload для отладки (без токена)
@@ -473,15 +780,8 @@ def send_telegram_message(
     parse_mode: str = "HTML",
 ) -> None:
     """Отправка обычного текстового сообщения в Telegram (используем, если нет видео/картинок)."""
-    bot_token = os.getenv("TELEGRAM_BOT_TOKEN") or TELEGRAM_BOT_TOKEN
-    chat_id_env = os.getenv("TELEGRAM_CHAT_ID")
-    if chat_id_env:
-        try:
-            chat_id = int(chat_id_env)
-        except ValueError:
-            chat_id = chat_id_env
-    else:
-        chat_id = TELEGRAM_CHAT_ID
+    # Токен и chat_id разобраны один раз при импорте — см. блок CONFIG
+    chat_id = TELEGRAM_CHAT_ID
 
     logging.info("Отправка текстового сообщения в Telegram: chat_id=%s", chat_id)
 
@@ -489,23 +789,26 @@ def send_telegram_message(
         text = text[:4093] + "..."
         logging.warning("Текст сообщения обрезан до 4096 символов.")
 
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
     payload = {
         "chat_id": chat_id,
         "text": text,
         "parse_mode": parse_mode,
     }
 
+    _telegram_rate_limit()
     try:
-        resp = requests.post(url, json=payload, timeout=30)
+        resp = _tg_post(_SEND_MSG_URL, payload)
         resp.raise_for_status()
         logging.info("Отправлено текстовое сообщение в Telegram.")
-    except requests.exceptions.HTTPError as e:
+    except _HTTP_STATUS_ERRORS as e:
         error_detail = ""
         try:
-            error_json = resp.json()
+            error_json = _json_loads(resp.content)
             error_detail = f" | Telegram API ответ: {error_json}"
         except:
+            # Telegram отвечает в UTF-8 — фиксируем кодировку, чтобы requests
+            # не запускал дорогое автоопределение ради обрезка тела ошибки
+            resp.encoding = "utf-8"
             error_detail = f" | Ответ сервера: {resp.text[:500]}"
         logging.error("Ошибка Telegram API при отправке сообщения: %s%s", str(e), error_detail)
         raise
@@ -515,62 +818,72 @@ def send_telegram_message(
 # ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
 # ==========================
 
-def extract_video_preview_urls(attachments: List[Dict[str, Any]]) -> List[Dict[str, str]]:
-    """Извлечь URL превью-картинок и ссылки на видео из видео-вложений VK.
+# Поля first_frame_* в порядке убывания размера — fallback, если у видео
+# нет массива image (константа модуля, чтобы не собирать кортеж на вызов)
+_FRAME_KEYS = ("first_frame_800", "first_frame_640", "first_frame_320", "first_frame")
+
 
-    Возвращает список словарей с ключами 'photo_url' и 'video_url'.
+def _img_width(img: Dict[str, Any]) -> int:
+    """Ширина превью (ключ width у VK бывает не у всех размеров)."""
+    return img.get("width", 0)
+
+
+def scan_video_attachments(
+    attachments: List[Dict[str, Any]],
+) -> tuple[bool, List[Dict[str, str]], str | None]:
+    """Один проход по вложениям: всё про видео за раз.
+
+    Раньше фильтр, извлечение превью и поиск первой ссылки обходили
+    attachments тремя отдельными циклами — теперь один.
+    Возвращает (has_video, превью с ссылками, ссылка на первое видео).
     """
-    result: List[Dict[str, str]] = []
+    has_video = False
+    previews: List[Dict[str, str]] = []
+    first_link: str | None = None
+
     for a in attachments:
         if a.get("type") != "video":
             continue
+        has_video = True
 
         video = a.get("video") or {}
-        
+
         # Получаем ссылку на видео
         owner_id = video.get("owner_id")
         video_id = video.get("id")
         video_url = None
         if owner_id is not None and video_id is not None:
             video_url = f"https://vk.com/video{owner_id}_{video_id}"
+            if first_link is None:
+                first_link = video_url
 
         # Вариант 1: поле image — список разных размеров
         images = video.get("image") or []
         photo_url = None
         if isinstance(images, list) and images:
-            # выбираем картинку с максимальной шириной
-            best = max(images, key=lambda img: img.get("width", 0))
+            # Список размеров крошечный (до ~10 элементов), поэтому честный
+            # max корректен при любом порядке и дешевле «страховок» на
+            # предположении, что VK отдаёт image по возрастанию ширины
+            best = max(images, key=_img_width)
             photo_url = best.get("url")
-        
+
         # Вариант 2: first_frame_* поля (если image не сработало)
         if not photo_url:
-            for key in ("first_frame_800", "first_frame_640", "first_frame_320", "first_frame"):
+            for key in _FRAME_KEYS:
                 url = video.get(key)
                 if isinstance(url, str) and url:
                     photo_url = url
                     break
-        
-        if photo_url:
-            result.append({
+
+        # Инвариант производителя: в previews попадают только валидные
+        # http(s)-URL, потребителям перепроверять нечего
+        if photo_url and photo_url.startswith(("http://", "https://")):
+            previews.append({
                 "photo_url": photo_url,
                 "video_url": video_url or ""
             })
 
-    return result
-
-
-def get_first_video_link(attachments: List[Dict[str, Any]]) -> str | None:
-    """Получить прямую ссылку на первое видео из вложений VK."""
-    for a in attachments:
-        if a.get("type") != "video":
-            continue
-        video = a.get("video") or {}
-        owner_id = video.get("owner_id")
-        video_id = video.get("id")
-        if owner_id is None or video_id is None:
-            continue
-        return f"https://vk.com/video{owner_id}_{video_id}"
-    return None
+    return has_video, previews, first_link
 
 
 def build_post_caption(text: str, video_link: str | None = None, stream_links: List[str] | None = None) -> str:
@@ -588,7 +901,8 @@ def build_post_caption(text: str, video_link: str | None = None, stream_links: L
     header = "⚡️Новая трансляция от Прайм Теннис"
     
     raw = (text or "").strip()
-    logging.info("build_post_caption: исходный текст = '%s' (длина %s)", raw[:200], len(raw))
+    if _ROOT_LOGGER.isEnabledFor(logging.INFO):
+        logging.info("build_post_caption: исходный текст = '%s' (длина %s)", raw[:200], len(raw))
     
     if not raw:
         # Если текста нет, всё равно отправляем заголовок (может быть пост только с картинкой/видео)
@@ -598,30 +912,11 @@ def build_post_caption(text: str, video_link: str | None = None, stream_links: L
         logging.warning("build_post_caption: текст поста пустой, возвращаю только заголовок")
         return caption
 
-    lines = [line.rstrip() for line in raw.splitlines()]
-    cleaned_lines: List[str] = []
-
-    for line in lines:
-        low = line.lower()
-
-        # жёсткие исключения по подстрокам
-        if "наш telegram - t.me/primetennis".lower() in low:
-            logging.debug("build_post_caption: пропущена строка с t.me/primetennis: %s", line[:50])
-            continue
-        if "t.me/primetennis".lower() in low:
-            logging.debug("build_post_caption: пропущена строка с t.me/primetennis: %s", line[:50])
-            continue
-        if "поддержать группу" in low:
-            logging.debug("build_post_caption: пропущена строка с 'поддержать группу': %s", line[:50])
-            continue
-        if "tips.tips/000457857" in low:
-            logging.debug("build_post_caption: пропущена строка с tips.tips: %s", line[:50])
-            continue
-
-        cleaned_lines.append(line)
-
-    caption = "\n".join(cleaned_lines).strip()
-    logging.info("build_post_caption: после очистки = '%s' (длина %s)", caption[:200], len(caption))
+    # Жёсткие исключения: два sub по всему тексту в C вместо списка строк,
+    # построчных проверок и join
+    caption = _TRAILING_WS_RE.sub("", _DROP_LINE_RE.sub("", raw)).strip()
+    if _ROOT_LOGGER.isEnabledFor(logging.INFO):
+        logging.info("build_post_caption: после очистки = '%s' (длина %s)", caption[:200], len(caption))
 
     # Добавляем ссылки на трансляции
     links_to_add = []
@@ -653,96 +948,165 @@ def build_post_caption(text: str, video_link: str | None = None, stream_links: L
 # ОСНОВНАЯ ЛОГИКА
 # ==========================
 
-def process_posts() -> None:
-    """Основной цикл обработки новых постов VK."""
-    state = load_state()
-    last_id = int(state.get("last_post_id", 0))
-    initialized = bool(state.get("initialized", False))
+def handle_post(post: Dict[str, Any]) -> bool:
+    """Обработать один пост: фильтр, подпись, отправка в Telegram.
+
+    Возвращает True, если пост успешно отправлен.
+    Общая точка входа для цикла опроса (process_posts) и для push-обработчика
+    событий wall_post_new из VK Callback API (run_callback_server).
+    """
+    post_id = int(post["id"])
+    text = post.get("text", "") or ""
+    attachments = post.get("attachments") or []
+
+    # Логируем что получили из API
+    if _ROOT_LOGGER.isEnabledFor(logging.INFO):
+        logging.info("Пост %s: текст = '%s' (длина %s), вложений = %s", post_id, text[:100], len(text), len(attachments))
+
+    # Один проход по вложениям вместо трёх (фильтр + превью + первая ссылка)
+    has_video, photos_with_links, _first_video_link = scan_video_attachments(attachments)
+
+    if not is_broadcast_post(text, has_video):
+        logging.info("Пост %s пропущен фильтром is_broadcast_post", post_id)
+        return False
+
+    stream_links = post.get("stream_links", [])  # Получаем ссылки на трансляции (включая не-видео ссылки)
+    logging.info("Пост %s: найдено превью видео: %s, всего ссылок: %s", post_id, len(photos_with_links), len(stream_links))
+
+    # Формируем базовую подпись (текст поста + ссылки, которые не относятся к видео)
+    # Ссылки на видео будут добавлены к соответствующим картинкам
+    video_links = [item.get("video_url", "") for item in photos_with_links if item.get("video_url")]
+    non_video_links = [link for link in stream_links if link not in video_links]
+    base_caption = build_post_caption(text, None, non_video_links)
+
+    # Логируем что получилось
+    if _ROOT_LOGGER.isEnabledFor(logging.INFO):
+        logging.info("Пост %s: base_caption = '%s' (длина %s символов), фото с ссылками = %s",
+                    post_id, base_caption[:150], len(base_caption), len(photos_with_links))
+
+    try:
+        if photos_with_links:
+            # Есть превью — шлём медиагруппу (каждая картинка со своей ссылкой)
+            logging.info(
+                "Пост %s: отправляю медиагруппу из %s фото, каждая со своей ссылкой",
+                post_id,
+                len(photos_with_links),
+            )
+            send_telegram_media_group(photos_with_links, base_caption)
+        else:
+            # Нет видео/картинок — шлём просто текст
+            logging.info(
+                "Пост %s: превью видео не найдено, отправляем текстовое сообщение без медиа.",
+                post_id,
+            )
+            send_telegram_message(base_caption)
+    except Exception:
+        # По требованиям — просто логируем и двигаемся дальше
+        logging.exception("Ошибка при отправке поста %s в Telegram.", post_id)
+        return False
+
+    logging.info("Пост %s успешно отправлен в Telegram.", post_id)
+    return True
 
+
+def process_posts() -> int:
+    """Основной цикл обработки новых постов VK.
+
+    Возвращает число отправленных постов — по нему сервисный цикл
+    подстраивает интервал опроса (см. main).
+    """
     posts = get_vk_posts()
     if not posts:
         logging.info("Новых постов в VK не найдено.")
-        return
-
-    # Первый запуск: просто запоминаем максимальный id и ничего не шлём
-    if not initialized:
-        max_id = max(p["id"] for p in posts) if posts else 0
-        state["last_post_id"] = max_id
-        state["initialized"] = True
-        save_state(state)
+        return 0
+
+    # Первый запуск (маркера в базе ещё нет): просто помечаем текущие
+    # посты как отправленные и ничего не шлём
+    if not is_state_initialized():
+        for p in posts:
+            mark_post_sent(int(p["id"]))
+        mark_state_initialized()
         logging.info(
-            "Первый запуск: инициализировали last_post_id=%s, отправка постов не выполнялась.",
-            max_id,
+            "Первый запуск: пометили %s текущих пост(ов) как отправленные, отправка не выполнялась.",
+            len(posts),
         )
-        return
-    
-    logging.info("Обработка постов: last_id=%s, получено постов=%s", last_id, len(posts))
-
-    # Идём от старых к новым, чтобы в ТГ хронология была нормальной
-    posts_sorted = sorted(posts, key=lambda p: p["id"])
+        return 0
+
+    logging.info("Обработка постов: получено постов=%s", len(posts))
+
+    # Сначала отфильтровываем уже отправленные (новых обычно единицы),
+    # потом сортируем только их: O(k log k) вместо сортировки всей выдачи
+    new_posts = [p for p in posts if not is_post_sent(int(p["id"]))]
+    if not new_posts:
+        logging.info("Все полученные посты уже были отправлены.")
+        return 0
+
+    # Идём от старых к новым, чтобы в ТГ хронология была нормальной.
+    # Отправляем строго последовательно: Telegram показывает сообщения в
+    # порядке прихода, и параллельные отправки перемешали бы ленту.
+    # Параллелизм остаётся там, где он безопасен и где основной выигрыш —
+    # в HEAD-валидации фото (_prune_dead_photo_urls).
+    new_posts.sort(key=itemgetter("id"))
+
+    sent_count = 0
+    for post in new_posts:
+        if handle_post(post):
+            # Помечаем только фактически отправленные посты
+            mark_post_sent(int(post["id"]))
+            sent_count += 1
+
+    return sent_count
+
+
+def run_callback_server() -> None:
+    """Push-режим: принимаем события VK Callback API вместо опроса wall.get.
+
+    VK сам присылает POST с событием wall_post_new сразу после публикации,
+    так что пост уходит в Telegram за секунды, а не после очередного тика
+    опроса. Настройки через .env:
+    - VK_CALLBACK_PORT — порт HTTP-сервера (по умолчанию 8080);
+    - VK_CALLBACK_CONFIRMATION — строка подтверждения из настроек группы;
+    - VK_CALLBACK_SECRET — секретный ключ (опционально, но рекомендуется).
+    """
+    from flask import Flask, request as flask_request
 
-    new_last_id = last_id
-    for post in posts_sorted:
-        post_id = int(post["id"])
-        logging.info("Обрабатываю пост %s, last_id = %s", post_id, last_id)
-        
-        if post_id <= last_id:
-            logging.info("Пост %s уже был отправлен (post_id <= last_id), пропускаю", post_id)
-            continue
+    confirmation = os.getenv("VK_CALLBACK_CONFIRMATION", "")
+    secret = os.getenv("VK_CALLBACK_SECRET", "")
+    port = int(os.getenv("VK_CALLBACK_PORT", "8080"))
 
-        text = post.get("text", "") or ""
-        attachments = post.get("attachments") or []
+    app = Flask(__name__)
 
-        # Логируем что получили из API
-        logging.info("Пост %s: текст = '%s' (длина %s), вложений = %s", post_id, text[:100], len(text), len(attachments))
+    @app.post("/")
+    def vk_callback():
+        event = flask_request.get_json(silent=True) or {}
 
-        if not is_broadcast_post(text, attachments):
-            logging.info("Пост %s пропущен фильтром is_broadcast_post", post_id)
-            continue
+        # Если задан секрет — отбрасываем события без него
+        if secret and event.get("secret") != secret:
+            logging.warning("Callback API: событие с неверным secret, игнорирую.")
+            return "ok"
 
-        photos_with_links = extract_video_preview_urls(attachments)
-        stream_links = post.get("stream_links", [])  # Получаем ссылки на трансляции (включая не-видео ссылки)
-        logging.info("Пост %s: найдено превью видео: %s, всего ссылок: %s", post_id, len(photos_with_links), len(stream_links))
-        
-        # Формируем базовую подпись (текст поста + ссылки, которые не относятся к видео)
-        # Ссылки на видео будут добавлены к соответствующим картинкам
-        video_links = [item.get("video_url", "") for item in photos_with_links if item.get("video_url")]
-        non_video_links = [link for link in stream_links if link not in video_links]
-        base_caption = build_post_caption(text, None, non_video_links)
-        
-        # Логируем что получилось
-        logging.info("Пост %s: base_caption = '%s' (длина %s символов), фото с ссылками = %s", 
-                    post_id, base_caption[:150], len(base_caption), len(photos_with_links))
+        event_type = event.get("type")
+        if event_type == "confirmation":
+            logging.info("Callback API: запрос подтверждения сервера.")
+            return confirmation
 
-        try:
-            if photos_with_links:
-                # Есть превью — шлём медиагруппу (каждая картинка со своей ссылкой)
-                logging.info(
-                    "Пост %s: отправляю медиагруппу из %s фото, каждая со своей ссылкой",
-                    post_id,
-                    len(photos_with_links),
-                )
-                send_telegram_media_group(photos_with_links, base_caption)
-            else:
-                # Нет видео/картинок — шлём просто текст
-                logging.info(
-                    "Пост %s: превью видео не найдено, отправляем текстовое сообщение без медиа.",
-                    post_id,
-                )
-                send_telegram_message(caption)
-        except Exception:
-            # По требованиям — просто логируем и двигаемся дальше
-            logging.exception("Ошибка при отправке поста %s в Telegram.", post_id)
-            continue
+        if event_type == "wall_post_new":
+            post = _convert_vk_item(event.get("object") or {})
+            if post.get("id") is None:
+                logging.warning("Callback API: событие wall_post_new без id поста.")
+                return "ok"
+            post_id = int(post["id"])
+            # Callback может ретраить событие — дедупликация та же, что при опросе
+            if is_post_sent(post_id):
+                logging.info("Пост %s уже был отправлен, пропускаю", post_id)
+            elif handle_post(post):
+                mark_post_sent(post_id)
 
-        new_last_id = max(new_last_id, post_id)
-        logging.info("Пост %s успешно отправлен в Telegram.", post_id)
+        # VK ждёт в ответ "ok", иначе будет повторять доставку события
+        return "ok"
 
-    # Обновляем состояние, если были новые отправленные посты
-    if new_last_id > last_id:
-        state["last_post_id"] = new_last_id
-        save_state(state)
-        logging.info("Обновлён last_post_id до %s.", new_last_id)
+    logging.info("✅ Запуск сервера VK Callback API на порту %s (push вместо опроса).", port)
+    app.run(host="0.0.0.0", port=port)
 
 
 def main() -> None:
@@ -755,7 +1119,7 @@ def main() -> None:
         logging.error("Не задан VK_TOKEN в vk_to_telegram.py")
         return
     
-    telegram_token = os.getenv("TELEGRAM_BOT_TOKEN") or TELEGRAM_BOT_TOKEN
+    telegram_token = TELEGRAM_BOT_TOKEN
     if not telegram_token or telegram_token == "TELEGRAM_BOT_TOKEN":
         logging.error("Не задан TELEGRAM_BOT_TOKEN. Добавьте TELEGRAM_BOT_TOKEN в .env файл или задайте в vk_to_telegram.py")
         return
@@ -763,24 +1127,61 @@ def main() -> None:
     # Проверяем, запущен ли скрипт как сервис (через systemd)
     # Если да, работаем в цикле. Если нет (запуск вручную), выполняем один раз
     is_service = os.getenv("SYSTEMD_SERVICE", "0") == "1"
-    
+
+    # Push-режим: если настроен VK Callback API, поднимаем HTTP-сервер и ждём
+    # события wall_post_new от VK вместо периодического опроса стены.
+    if is_service and os.getenv("VK_CALLBACK", "0") == "1":
+        run_callback_server()
+        return
+
     if is_service:
-        # Режим сервиса: работаем в цикле
-        import time
-        CHECK_INTERVAL = 15 * 60  # 15 минут в секундах
-        
-        logging.info("Запуск в режиме сервиса. Интервал проверки: %s минут", CHECK_INTERVAL // 60)
-        
-        while True:
+        # Режим сервиса: работаем в цикле с адаптивным интервалом.
+        # Пока постов нет — интервал удваивается (меньше холостых запросов к
+        # VK и Telegram), при первом же отправленном посте сбрасывается.
+        import signal
+
+        MIN_INTERVAL = 60        # 1 минута — пока группа активна
+        MAX_INTERVAL = 30 * 60   # 30 минут — потолок при затишье
+
+        # Event вместо time.sleep: SIGTERM от systemd будит ожидание сразу,
+        # а не через остаток интервала
+        stop_event = threading.Event()
+
+        def _on_sigterm(signum, frame):
+            logging.info("Получен SIGTERM, останавливаем сервис...")
+            stop_event.set()
+
+        signal.signal(signal.SIGTERM, _on_sigterm)
+
+        logging.info(
+            "Запуск в режиме сервиса. Интервал проверки: от %s до %s минут (адаптивный).",
+            MIN_INTERVAL // 60, MAX_INTERVAL // 60,
+        )
+
+        interval = MIN_INTERVAL
+        next_tick = time.monotonic()
+        while not stop_event.is_set():
             try:
-                process_posts()
+                sent = process_posts()
             except Exception:
                 # По требованиям: просто логируем, без доп. уведомлений
                 logging.exception("Необработанная ошибка при обработке постов.")
-            
-            # Ждем перед следующей проверкой
-            logging.debug("Ожидание %s секунд до следующей проверки...", CHECK_INTERVAL)
-            time.sleep(CHECK_INTERVAL)
+                sent = 0
+
+            if sent > 0:
+                interval = MIN_INTERVAL
+            else:
+                interval = min(interval * 2, MAX_INTERVAL)
+
+            # Дедлайн по монотонным часам: время, потраченное самим тиком,
+            # не сдвигает каденцию (долгий тик не превращает 15 минут в 17)
+            next_tick = max(next_tick + interval, time.monotonic())
+            wait = next_tick - time.monotonic()
+            logging.debug("Ожидание %.0f секунд до следующей проверки...", wait)
+            if stop_event.wait(wait):
+                break
+
+        logging.info("Сервис остановлен.")
     else:
         # Режим одноразового запуска (для cron или ручного запуска)
         try: